@@ -0,0 +1,204 @@
+import hashlib
+import struct
+from collections import OrderedDict
+from typing import List, Union
+
+import numpy as np
+
+from distancias import ProvedorDistancias, como_provedor
+from tipos import Individuo, Populacao
+
+# Elementos (linhas × cidades) avaliados de uma vez: cada temporário do lote (rotas em intp,
+# estoque, passadas, índices das origens) tem no máximo esse tamanho, ~2 MB em 64 bits
+MAXIMO_ELEMENTOS_LOTE = 1 << 18
+
+
+def calcular_fitness_lote(
+    rotas: np.ndarray,
+    veiculos: np.ndarray,
+    capacidade: np.ndarray,
+    capacidade_armazem_cidades: List[int],
+    dist_matrix: Union[np.ndarray, ProvedorDistancias],
+    maximo_elementos: int = MAXIMO_ELEMENTOS_LOTE,
+) -> np.ndarray:
+    # Mesmo cálculo de Individuo.calcular_fitness para P indivíduos de uma vez:
+    # rotas (P, N), veiculos (P,) e capacidade (P,). As linhas vão em blocos de até
+    # `maximo_elementos` elementos, então a memória temporária não cresce com P.
+    rotas = np.asarray(rotas)
+    veiculos = np.asarray(veiculos, dtype=np.int64)
+    capacidade = np.asarray(capacidade, dtype=np.int64)
+    estoque = np.asarray(capacidade_armazem_cidades, dtype=np.int64)
+    distancias = como_provedor(dist_matrix)
+
+    tamanho_populacao, tamanho = rotas.shape
+    linhas_bloco = max(maximo_elementos // max(tamanho, 1), 1)
+
+    fitness = np.empty(tamanho_populacao, dtype=np.float64)
+    for inicio in range(0, tamanho_populacao, linhas_bloco):
+        fim = min(inicio + linhas_bloco, tamanho_populacao)
+        fitness[inicio:fim] = _calcular_fitness_bloco(
+            rotas[inicio:fim], veiculos[inicio:fim], capacidade[inicio:fim], estoque, distancias
+        )
+    return fitness
+
+
+def _calcular_fitness_bloco(
+    rotas: np.ndarray,
+    veiculos: np.ndarray,
+    capacidade: np.ndarray,
+    estoque: np.ndarray,
+    distancias: ProvedorDistancias,
+) -> np.ndarray:
+    rotas = np.asarray(rotas, dtype=np.intp)
+    tamanho_populacao, tamanho = rotas.shape
+
+    entrega_por_passada = (capacidade * veiculos)[:, None]
+    velocidade = (120 - capacidade).astype(np.float64)
+
+    # Passadas que cada armazém precisa até atingir o estoque mínimo, na ordem da rota
+    estoque = estoque[rotas]
+    passadas = np.where(estoque > 0, -(-estoque // entrega_por_passada), 0)
+
+    tempo_total = np.zeros(tamanho_populacao, dtype=np.int64) # Tempo em centésimos
+
+    # O trecho entre as posições i e i + salto é percorrido enquanto os dois armazéns estão na rota
+    # a percorrer e todos os armazéns entre eles já foram abastecidos:
+    # min(passadas[i], passadas[i + salto]) - max(passadas entre eles) vezes
+    #
+    # O máximo entre as posições só cresce com o salto, então uma origem que deixa de passar dele
+    # nunca mais volta. Só as origens ainda ativas (linha, coluna) seguem para o salto seguinte,
+    # o que deixa o total perto de O(P · N log N) em vez de O(P · N²).
+    # As origens são guardadas como índices no array achatado (linha * tamanho + coluna).
+    linhas, colunas = np.nonzero(passadas[:, : tamanho - 1] > 0)
+    posicoes = linhas * tamanho + colunas
+    passadas_planas = passadas.ravel()
+    rotas_planas = rotas.ravel()
+    origem = passadas_planas[posicoes]
+    maximo_entre = np.zeros(len(posicoes), dtype=np.int64)
+
+    for salto in range(1, tamanho):
+        if salto > 1:
+            maximo_entre = np.maximum(maximo_entre, passadas_planas[posicoes + salto - 1])
+            ativas = (origem > maximo_entre) & (colunas < tamanho - salto)
+            posicoes, colunas, origem, maximo_entre = posicoes[ativas], colunas[ativas], origem[ativas], maximo_entre[ativas]
+
+        if not len(posicoes):
+            break
+
+        vezes = np.minimum(origem, passadas_planas[posicoes + salto]) - maximo_entre
+        percorridos = vezes > 0
+        if not percorridos.any():
+            continue
+
+        trechos = posicoes[percorridos]
+        linhas_trecho = trechos // tamanho
+        distancia = distancias.pares(rotas_planas[trechos], rotas_planas[trechos + salto])
+        tempo = np.rint(np.round(distancia / velocidade[linhas_trecho], 2) * 100).astype(np.int64)
+
+        tempo_total += np.bincount(
+            linhas_trecho, weights=tempo * vezes[percorridos], minlength=tamanho_populacao
+        ).astype(np.int64)
+
+    return np.round(tempo_total * veiculos / 100, 2)
+
+
+def avaliar_populacao(
+    populacao: Union[List[Individuo], Populacao],
+    capacidade_armazem_cidades: List[int],
+    dist_matrix: Union[np.ndarray, ProvedorDistancias],
+) -> List[float]:
+    if not len(populacao):
+        return []
+
+    if isinstance(populacao, Populacao):
+        populacao.fitness[:] = calcular_fitness_lote(
+            populacao.rotas, populacao.veiculos, populacao.capacidade, capacidade_armazem_cidades, dist_matrix
+        )
+        return populacao.fitness.tolist()
+
+    rotas = np.array([individuo.rota for individuo in populacao], dtype=np.int32) # intp só bloco a bloco
+    veiculos = np.array([individuo.veiculos for individuo in populacao], dtype=np.int64)
+    capacidade = np.array([individuo.capacidade for individuo in populacao], dtype=np.int64)
+
+    return calcular_fitness_lote(rotas, veiculos, capacidade, capacidade_armazem_cidades, dist_matrix).tolist()
+
+
+class CacheFitness:
+    # Cache LRU de fitness por genótipo (veículos, capacidade, rota) para um estoque e uma matriz de distâncias
+    def __init__(
+        self,
+        capacidade_armazem_cidades: List[int],
+        dist_matrix: Union[np.ndarray, ProvedorDistancias],
+        tamanho_maximo: int = 100000,
+        avaliador=None,
+    ):
+        self.capacidade_armazem_cidades = capacidade_armazem_cidades
+        self.dist_matrix = dist_matrix
+        self.tamanho_maximo = tamanho_maximo
+        self.avaliador = avaliador # Objeto com avaliar_populacao (ex.: AvaliadorParalelo); None avalia neste processo
+        self.acertos = 0
+        self.faltas = 0
+        self._fitness = OrderedDict()
+
+    def __len__(self):
+        return len(self._fitness)
+
+    def __repr__(self):
+        return f"Avaliações: {self.acertos + self.faltas}, Economizadas: {self.acertos}, Calculadas: {self.faltas}, Em cache: {len(self)}"
+
+    @staticmethod
+    def chave(individuo: Individuo) -> bytes:
+        genotipo = struct.pack("<ii", individuo.veiculos, individuo.capacidade)
+        genotipo += np.asarray(individuo.rota, dtype=np.int32).tobytes()
+        return hashlib.blake2b(genotipo, digest_size=16).digest()
+
+    def _guardar(self, chave: bytes, fitness: float):
+        self._fitness[chave] = fitness
+        if len(self._fitness) > self.tamanho_maximo:
+            self._fitness.popitem(last=False) # Descarta o genótipo usado há mais tempo
+
+    def avaliar(self, individuo: Individuo) -> float:
+        chave = self.chave(individuo)
+        fitness = self._fitness.get(chave)
+
+        if fitness is not None:
+            self.acertos += 1
+            self._fitness.move_to_end(chave)
+            return fitness
+
+        self.faltas += 1
+        fitness = individuo.calcular_fitness(self.capacidade_armazem_cidades, self.dist_matrix)
+        self._guardar(chave, fitness)
+        return fitness
+
+    def avaliar_populacao(self, populacao: List[Individuo]) -> List[float]:
+        chaves = [self.chave(individuo) for individuo in populacao]
+        fitness_populacao = [None] * len(populacao)
+
+        # Genótipos fora do cache são avaliados uma única vez, em lote
+        pendentes = {}
+        for i, chave in enumerate(chaves):
+            fitness = self._fitness.get(chave)
+            if fitness is not None:
+                self._fitness.move_to_end(chave)
+                fitness_populacao[i] = fitness
+            elif chave not in pendentes:
+                pendentes[chave] = i
+
+        self.faltas += len(pendentes)
+        self.acertos += len(populacao) - len(pendentes)
+
+        faltantes = [populacao[i] for i in pendentes.values()]
+        if self.avaliador is None:
+            calculados = avaliar_populacao(faltantes, self.capacidade_armazem_cidades, self.dist_matrix)
+        else:
+            calculados = self.avaliador.avaliar_populacao(faltantes)
+        novos = dict(zip(pendentes, calculados))
+        for chave, fitness in novos.items():
+            self._guardar(chave, fitness)
+
+        for i, chave in enumerate(chaves):
+            if fitness_populacao[i] is None:
+                fitness_populacao[i] = novos[chave]
+
+        return fitness_populacao
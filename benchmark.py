@@ -0,0 +1,236 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import funcoes
+from avaliacao import calcular_fitness_lote
+from distancias import OraculoCoordenadas
+from funcoes import calcular_matriz_distancias, gerador_python, gerar_populacao, mutate, order_crossover
+from selecao import METODOS_SELECAO, SelecaoGeracao
+from solver import AlgoritmoGenetico
+from tipos import Populacao
+
+# Benchmarks sem interface gráfica: instâncias sintéticas de vários tamanhos, latência p50/p99,
+# vazão e pico de memória (tracemalloc) de cada operação, em JSON. Com --base compara com um
+# resultado salvo antes e marca as operações que ficaram mais lentas que a tolerância.
+#
+#   python benchmark.py --saida base.json
+#   python benchmark.py --base base.json
+
+TAMANHOS_PADRAO = [10, 100, 1000, 10000]
+MAXIMO_MATRIZ = 5000 # Acima disso a matriz N×N não é montada e o fitness usa o oráculo de coordenadas
+METODOS_SELECAO_LEGADO = [
+    funcoes.metodo_selecao_aleatorio,
+    funcoes.metodo_selecao_torneio,
+    funcoes.metodo_selecao_roleta,
+    funcoes.metodo_selecao_rank,
+    funcoes.metodo_selecao_elitismo,
+    funcoes.metodo_selecao_truncamento,
+]
+
+
+def instancia_sintetica(quantidade: int, estoque_minimo: int, estoque_maximo: int, semente: int = 0):
+    # Armazéns espalhados num quadrado proporcional à quantidade, com estoque mínimo uniforme
+    rng = np.random.default_rng(semente)
+    lado = int(100 * max(quantidade, 1) ** 0.5)
+    local_cidades = [tuple(ponto) for ponto in rng.integers(0, lado, size=(quantidade, 2)).tolist()]
+    estoque = rng.integers(estoque_minimo, estoque_maximo, size=quantidade, endpoint=True).tolist()
+    return local_cidades, estoque
+
+
+def medir(
+    funcao: Callable[[], object],
+    tempo_alvo: float = 0.2,
+    minimo_repeticoes: int = 5,
+    maximo_repeticoes: int = 10000,
+    itens: int = 1,
+) -> Dict[str, float]:
+    # Repete até `tempo_alvo` segundos (respeitando os limites de repetições); o pico de memória
+    # vem de uma chamada extra com tracemalloc ligado, para não pesar nos tempos
+    funcao() # Aquecimento
+    duracoes = []
+    inicio = time.perf_counter()
+    while len(duracoes) < maximo_repeticoes and (
+        len(duracoes) < minimo_repeticoes or time.perf_counter() - inicio < tempo_alvo
+    ):
+        antes = time.perf_counter_ns()
+        funcao()
+        duracoes.append(time.perf_counter_ns() - antes)
+
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    duracoes = np.asarray(duracoes, dtype=np.float64)
+    media = float(duracoes.mean())
+    return {
+        "repeticoes": len(duracoes),
+        "p50_us": round(float(np.percentile(duracoes, 50)) / 1000, 3),
+        "p99_us": round(float(np.percentile(duracoes, 99)) / 1000, 3),
+        "media_us": round(media / 1000, 3),
+        "vazao_por_s": round(itens * 1e9 / media, 1) if media else None,
+        "pico_memoria_kb": round(pico / 1024, 1),
+    }
+
+
+def benchmarks_tamanho(
+    quantidade: int,
+    estoque_minimo: int,
+    estoque_maximo: int,
+    tamanho_populacao: int,
+    tempo_alvo: float,
+    semente: int = 0,
+) -> Dict[str, Dict[str, float]]:
+    local_cidades, estoque = instancia_sintetica(quantidade, estoque_minimo, estoque_maximo, semente)
+    rng = gerador_python(semente)
+    resultados = {}
+
+    def registrar(nome: str, funcao: Callable[[], object], itens: int = 1):
+        resultados[nome] = medir(funcao, tempo_alvo, itens=itens)
+
+    if quantidade <= MAXIMO_MATRIZ:
+        registrar("calcular_matriz_distancias", lambda: calcular_matriz_distancias(local_cidades))
+        dist_matrix = calcular_matriz_distancias(local_cidades)
+    else:
+        dist_matrix = OraculoCoordenadas(local_cidades)
+
+    populacao = gerar_populacao(local_cidades, 10, 50, tamanho_populacao, rng)
+    lote = Populacao.de_individuos(populacao)
+    fitness = calcular_fitness_lote(lote.rotas, lote.veiculos, lote.capacidade, estoque, dist_matrix)
+
+    individuos = iter(range(10 ** 9))
+    registrar(
+        "calcular_fitness",
+        lambda: populacao[next(individuos) % tamanho_populacao].calcular_fitness(estoque, dist_matrix),
+    )
+    registrar(
+        "calcular_fitness_lote",
+        lambda: calcular_fitness_lote(lote.rotas, lote.veiculos, lote.capacidade, estoque, dist_matrix),
+        itens=tamanho_populacao,
+    )
+
+    registrar("order_crossover", lambda: order_crossover(populacao[0], populacao[1], rng))
+    filho = order_crossover(populacao[0], populacao[1], rng)
+    registrar("mutate", lambda: mutate(filho, 1.0, rng))
+
+    # Métodos antigos de funcoes: lista (indivíduo, fitness) ordenada
+    populacao_fitness = sorted(zip(populacao, fitness.tolist()), key=lambda par: par[1])
+    for metodo in METODOS_SELECAO_LEGADO:
+        registrar(metodo.__name__, lambda metodo=metodo: metodo(populacao_fitness, rng))
+
+    # Métodos usados pelo solver: a SelecaoGeracao é montada uma vez por geração e cada método só sorteia índices
+    registrar("SelecaoGeracao", lambda: SelecaoGeracao(populacao, fitness))
+    selecao = SelecaoGeracao(populacao, fitness)
+    for metodo in METODOS_SELECAO.values():
+        registrar(metodo.__name__, lambda metodo=metodo: metodo(selecao, rng))
+
+    ag = AlgoritmoGenetico(
+        local_cidades,
+        estoque,
+        dist_matrix,
+        tamanho_populacao=tamanho_populacao,
+        tamanho_cache_fitness=0, # Sem cache: cada geração paga a avaliação inteira
+        semente=semente,
+    )
+    registrar("geracao", ag.passo)
+    return resultados
+
+
+def comparar(atual: dict, base: dict, tolerancia: float) -> List[dict]:
+    # Regressão: p50 mais de `tolerancia` (fração) acima do p50 da base na mesma operação e tamanho
+    regressoes = []
+    for tamanho, operacoes in atual["resultados"].items():
+        for nome, medida in operacoes.items():
+            anterior = base.get("resultados", {}).get(tamanho, {}).get(nome)
+            if not anterior or not anterior.get("p50_us"):
+                continue
+            razao = medida["p50_us"] / anterior["p50_us"]
+            medida["razao_base"] = round(razao, 3)
+            if razao > 1 + tolerancia:
+                regressoes.append({"tamanho": tamanho, "operacao": nome, "p50_us": medida["p50_us"], "p50_base_us": anterior["p50_us"], "razao": round(razao, 3)})
+    return regressoes
+
+
+def executar(
+    tamanhos: List[int],
+    estoque_minimo: int = 0,
+    estoque_maximo: int = 8000,
+    tamanho_populacao: int = 100,
+    tempo_alvo: float = 0.2,
+    base: Optional[dict] = None,
+    tolerancia: float = 0.5,
+) -> dict:
+    relatorio = {
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+        },
+        "parametros": {
+            "estoque_minimo": estoque_minimo,
+            "estoque_maximo": estoque_maximo,
+            "tamanho_populacao": tamanho_populacao,
+            "tempo_alvo": tempo_alvo,
+        },
+        "resultados": {},
+    }
+    for quantidade in tamanhos:
+        relatorio["resultados"][str(quantidade)] = benchmarks_tamanho(
+            quantidade, estoque_minimo, estoque_maximo, tamanho_populacao, tempo_alvo
+        )
+
+    if base is not None:
+        relatorio["tolerancia"] = tolerancia
+        relatorio["regressoes"] = comparar(relatorio, base, tolerancia)
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do GA de distribuição de carga")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Quantidades de armazéns")
+    parser.add_argument("--estoque-minimo", type=int, default=0)
+    parser.add_argument("--estoque-maximo", type=int, default=8000)
+    parser.add_argument("--populacao", type=int, default=100)
+    parser.add_argument("--tempo", type=float, default=0.2, help="Segundos de medição por operação")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON do relatório (sem ele imprime na saída padrão)")
+    parser.add_argument("--base", default=None, help="Relatório anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="Aumento do p50 aceito antes de marcar regressão (fração)")
+    args = parser.parse_args()
+
+    base = None
+    if args.base is not None:
+        with open(args.base, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+
+    relatorio = executar(
+        args.tamanhos, args.estoque_minimo, args.estoque_maximo, args.populacao, args.tempo, base, args.tolerancia
+    )
+
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida is None:
+        print(texto)
+    else:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto + "\n")
+
+    for regressao in relatorio.get("regressoes", []):
+        print(
+            f"Regressão: {regressao['operacao']} ({regressao['tamanho']} armazéns) "
+            f"p50 {regressao['p50_us']} us, base {regressao['p50_base_us']} us ({regressao['razao']}x)",
+            file=sys.stderr,
+        )
+    if relatorio.get("regressoes"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
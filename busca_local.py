@@ -0,0 +1,177 @@
+import time
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from distancias import ProvedorDistancias
+from vizinhanca import IndiceVizinhos
+
+# Busca local 2-opt / Or-opt sobre a rota aberta (a última cidade não volta para a primeira).
+# Os movimentos são avaliados só pela diferença nos trechos trocados, usando a distância total
+# da rota como aproximação do fitness, e só olham as cidades das listas de vizinhos.
+
+FORA_DA_ROTA = -1 # Antes da primeira e depois da última cidade; distância zero para qualquer cidade
+
+
+class BuscaLocal:
+    def __init__(
+        self,
+        dist_matrix: Union[np.ndarray, ProvedorDistancias],
+        vizinhos: Optional[np.ndarray] = None,
+        quantidade_vizinhos: int = 8,
+        maximo_movimentos: int = 1000,
+        tempo_limite: Optional[float] = None,
+        tamanho_maximo_segmento: int = 3,
+    ):
+        self.dist_matrix = dist_matrix
+        if vizinhos is None: # Sem lista pronta (ex.: IndiceVizinhos das coordenadas), monta da própria matriz
+            vizinhos = IndiceVizinhos(quantidade=quantidade_vizinhos, dist_matrix=dist_matrix).vizinhos
+        self.vizinhos = vizinhos
+        self._vizinhos = self.vizinhos.tolist()
+        self.maximo_movimentos = maximo_movimentos # Orçamento por geração (ver reiniciar_orcamento)
+        self.tempo_limite = tempo_limite # Segundos por geração; None sem limite de tempo
+        self.tamanho_maximo_segmento = tamanho_maximo_segmento
+        self.movimentos = 0
+        self._prazo = None
+        self.reiniciar_orcamento()
+
+    def reiniciar_orcamento(self):
+        self.movimentos = 0
+        self._prazo = None if self.tempo_limite is None else time.perf_counter() + self.tempo_limite
+
+    def tem_orcamento(self) -> bool:
+        if self.movimentos >= self.maximo_movimentos:
+            return False
+        return self._prazo is None or time.perf_counter() < self._prazo
+
+    def _distancia(self, origem: int, destino: int) -> float:
+        if origem == FORA_DA_ROTA or destino == FORA_DA_ROTA:
+            return 0.0
+        return float(self.dist_matrix[origem, destino])
+
+    def melhorar(self, rota: List[int]) -> Tuple[List[int], float]:
+        # Devolve uma nova rota e quanto a distância total mudou (zero ou negativo)
+        rota = [int(cidade) for cidade in rota]
+        if len(rota) < 3:
+            return rota, 0.0
+
+        posicao = {cidade: indice for indice, cidade in enumerate(rota)}
+        variacao_total = 0.0
+        melhorou = True
+        while melhorou and self.tem_orcamento():
+            melhorou = False
+            for i in range(len(rota)):
+                if not self.tem_orcamento():
+                    break
+                variacao = self._dois_opt(rota, posicao, i)
+                if variacao >= 0:
+                    variacao = self._or_opt(rota, posicao, i)
+                if variacao < 0:
+                    variacao_total += variacao
+                    self.movimentos += 1
+                    melhorou = True
+
+        return rota, variacao_total
+
+    @staticmethod
+    def _atualizar_posicoes(rota: List[int], posicao: dict, inicio: int, fim: int):
+        for indice in range(inicio, fim + 1):
+            posicao[rota[indice]] = indice
+
+    def _inverter(self, rota: List[int], posicao: dict, inicio: int, fim: int):
+        rota[inicio : fim + 1] = rota[inicio : fim + 1][::-1]
+        self._atualizar_posicoes(rota, posicao, inicio, fim)
+
+    def _dois_opt(self, rota: List[int], posicao: dict, i: int) -> float:
+        distancia = self._distancia
+        ultima = len(rota) - 1
+
+        a = rota[i]
+        b = rota[i + 1] if i < ultima else FORA_DA_ROTA
+        p = rota[i - 1] if i > 0 else FORA_DA_ROTA
+
+        # Troca os trechos (a, b) e (c, d) por (a, c) e (b, d), invertendo o que fica entre eles
+        for c in self._vizinhos[a]:
+            if c == a:
+                continue # Listas montadas com coordenadas repetidas podem trazer a própria cidade
+            if distancia(a, b) - distancia(a, c) <= 0:
+                break
+            j = posicao[c]
+            d = rota[j + 1] if j < ultima else FORA_DA_ROTA
+            variacao = distancia(a, c) + distancia(b, d) - distancia(a, b) - distancia(c, d)
+            if variacao < -1e-9 and min(i, j) + 1 < max(i, j):
+                self._inverter(rota, posicao, min(i, j) + 1, max(i, j))
+                return variacao
+
+        # Mesmo movimento olhando para trás: (p, a) e (e, c) viram (a, c) e (p, e)
+        for c in self._vizinhos[a]:
+            if c == a:
+                continue
+            if distancia(p, a) - distancia(a, c) <= 0:
+                break
+            j = posicao[c]
+            e = rota[j - 1] if j > 0 else FORA_DA_ROTA
+            variacao = distancia(a, c) + distancia(p, e) - distancia(p, a) - distancia(e, c)
+            if variacao < -1e-9 and min(i, j) < max(i, j) - 1:
+                self._inverter(rota, posicao, min(i, j), max(i, j) - 1)
+                return variacao
+
+        return 0.0
+
+    def _or_opt(self, rota: List[int], posicao: dict, i: int) -> float:
+        # Move um segmento de até tamanho_maximo_segmento cidades para junto de um vizinho de uma das pontas
+        distancia = self._distancia
+        ultima = len(rota) - 1
+
+        for tamanho in range(1, self.tamanho_maximo_segmento + 1):
+            fim = i + tamanho - 1
+            if fim > ultima:
+                break
+
+            primeira, final = rota[i], rota[fim]
+            p = rota[i - 1] if i > 0 else FORA_DA_ROTA
+            q = rota[fim + 1] if fim < ultima else FORA_DA_ROTA
+            ganho_remocao = distancia(p, primeira) + distancia(final, q) - distancia(p, q)
+            if ganho_remocao <= 1e-9:
+                continue
+
+            for ponta, outra_ponta in ((primeira, final), (final, primeira)):
+                for c in self._vizinhos[ponta]:
+                    if c == ponta:
+                        continue
+                    if distancia(c, ponta) >= ganho_remocao:
+                        break
+                    j = posicao[c]
+                    if i <= j <= fim:
+                        continue # c está no próprio segmento
+
+                    # Vizinhos de c na rota já sem o segmento
+                    seguinte = q if j == i - 1 else (rota[j + 1] if j < ultima else FORA_DA_ROTA)
+                    anterior = p if j == fim + 1 else (rota[j - 1] if j > 0 else FORA_DA_ROTA)
+
+                    # c antes da ponta: (c, ponta ... outra_ponta, seguinte)
+                    variacao = distancia(c, ponta) + distancia(outra_ponta, seguinte) - distancia(c, seguinte) - ganho_remocao
+                    if variacao < -1e-9:
+                        self._mover(rota, posicao, i, fim, j + 1, ponta != primeira)
+                        return variacao
+
+                    # c depois da ponta: (anterior, outra_ponta ... ponta, c)
+                    variacao = distancia(anterior, outra_ponta) + distancia(ponta, c) - distancia(anterior, c) - ganho_remocao
+                    if variacao < -1e-9:
+                        self._mover(rota, posicao, i, fim, j, ponta == primeira)
+                        return variacao
+
+        return 0.0
+
+    def _mover(self, rota: List[int], posicao: dict, inicio: int, fim: int, destino: int, inverter: bool):
+        # Tira rota[inicio..fim] e o insere antes da cidade que hoje está na posição `destino`
+        segmento = rota[inicio : fim + 1]
+        if inverter:
+            segmento.reverse()
+
+        if destino > fim:
+            rota[inicio : destino] = rota[fim + 1 : destino] + segmento
+            self._atualizar_posicoes(rota, posicao, inicio, destino - 1)
+        else:
+            rota[destino : fim + 1] = segmento + rota[destino:inicio]
+            self._atualizar_posicoes(rota, posicao, destino, fim)
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from tipos import Individuo, Populacao
+
+# Checkpoint do AlgoritmoGenetico entre duas gerações, num .npz sem pickle: a população que vai
+# ser avaliada no próximo passo (arrays compactos) com o fitness dela, o melhor até agora, o
+# contador de gerações e o estado completo dos dois geradores do GA (ag.random e ag.rng).
+# Retomar a partir dele segue exatamente a mesma sequência de gerações da execução original.
+
+VERSAO_CHECKPOINT = 2
+
+
+def _estado_random(rng) -> str:
+    versao, estado, gauss = rng.getstate()
+    return json.dumps({"versao": versao, "estado": list(estado), "gauss": gauss})
+
+
+def _restaurar_random(rng, texto: str):
+    estado = json.loads(texto)
+    rng.setstate((estado["versao"], tuple(estado["estado"]), estado["gauss"]))
+
+
+def salvar_checkpoint(ag, caminho: str):
+    # O fitness da próxima geração sai do cache; o passo seguinte só repete esses acertos
+    fitness = ag.cache_fitness.avaliar_populacao(ag.populacao)
+    populacao = ag.populacao
+    melhor = ag.melhor_individuo
+
+    dados = {
+        "versao": np.array(VERSAO_CHECKPOINT),
+        "geracao": np.array(ag.geracao_atual),
+        "rotas": populacao.rotas,
+        "veiculos": populacao.veiculos,
+        "capacidade": populacao.capacidade,
+        "fitness": np.asarray(fitness, dtype=np.float64),
+        "melhor_rota": np.asarray(melhor.rota, dtype=populacao.rotas.dtype),
+        "melhor_veiculos": np.array(melhor.veiculos),
+        "melhor_capacidade": np.array(melhor.capacidade),
+        "melhor_tempo": np.array(ag.melhor_tempo, dtype=np.float64),
+        "avaliacoes": np.array([ag.cache_fitness.acertos, ag.cache_fitness.faltas]),
+        "estado_random": np.array(_estado_random(ag.random)),
+        "estado_rng": np.array(json.dumps(ag.rng.bit_generator.state)),
+    }
+
+    # Escreve num temporário do mesmo diretório e troca de uma vez: um checkpoint interrompido
+    # no meio nunca substitui o anterior
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, prefix=".checkpoint-", suffix=".npz")
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            np.savez(arquivo, **dados)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def carregar_checkpoint(ag, caminho: str):
+    # O AlgoritmoGenetico precisa ter sido criado com os mesmos parâmetros da execução salva
+    with np.load(caminho, allow_pickle=False) as dados:
+        if int(dados["versao"]) != VERSAO_CHECKPOINT:
+            raise ValueError(f"Versão de checkpoint não suportada: {int(dados['versao'])}")
+        if dados["rotas"].shape[1] != len(ag.local_cidades):
+            raise ValueError(f"Checkpoint com {dados['rotas'].shape[1]} cidades, instância com {len(ag.local_cidades)}")
+
+        populacao = Populacao(len(dados["rotas"]), dados["rotas"].shape[1], dados["rotas"].dtype)
+        populacao.rotas[...] = dados["rotas"]
+        populacao.veiculos[...] = dados["veiculos"]
+        populacao.capacidade[...] = dados["capacidade"]
+
+        populacao.fitness[...] = dados["fitness"]
+        ag.populacao = populacao
+        ag.geracao_atual = int(dados["geracao"])
+        ag.melhor_individuo = Individuo(
+            int(dados["melhor_veiculos"]), int(dados["melhor_capacidade"]), dados["melhor_rota"].tolist()
+        )
+        ag.melhor_tempo = float(dados["melhor_tempo"])
+
+        # O fitness salvo volta para o cache, então o primeiro passo não recalcula nada
+        for individuo, fitness in zip(ag.populacao, dados["fitness"].tolist()):
+            ag.cache_fitness._guardar(ag.cache_fitness.chave(individuo), fitness)
+        ag.cache_fitness.acertos, ag.cache_fitness.faltas = dados["avaliacoes"].tolist()
+
+        _restaurar_random(ag.random, str(dados["estado_random"]))
+        ag.rng.bit_generator.state = json.loads(str(dados["estado_rng"]))
+    return ag
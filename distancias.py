@@ -0,0 +1,175 @@
+import math
+from collections import OrderedDict
+from typing import List, Tuple, Union
+
+import numpy as np
+
+# Provedores de distância entre cidades. O fitness e a busca local só usam esta interface:
+#   provedor[a][b] ou provedor[a, b]  -> distância entre duas cidades (provedor.distancia)
+#   provedor[origens, destinos]       -> distâncias par a par (arrays)
+#   provedor.ao_longo_da_rota(rota)   -> distância de cada trecho consecutivo da rota
+#   provedor.linhas(inicio, fim)      -> bloco de linhas da matriz
+# Uma matriz NumPy comum continua sendo aceita em todo lugar (ver como_provedor).
+
+
+class _Linha:
+    __slots__ = ("provedor", "origem")
+
+    def __init__(self, provedor: "ProvedorDistancias", origem: int):
+        self.provedor = provedor
+        self.origem = origem
+
+    def __getitem__(self, destino):
+        return self.provedor[self.origem, destino]
+
+
+class ProvedorDistancias:
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def pares(self, origens: np.ndarray, destinos: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def distancia(self, origem: int, destino: int) -> np.float64:
+        return self.pares(np.array([origem], dtype=np.intp), np.array([destino], dtype=np.intp))[0]
+
+    def linhas(self, inicio: int, fim: int) -> np.ndarray:
+        total = len(self)
+        origens = np.repeat(np.arange(inicio, fim), total)
+        destinos = np.tile(np.arange(total), fim - inicio)
+        return self.pares(origens, destinos).reshape(fim - inicio, total)
+
+    def ao_longo_da_rota(self, rota) -> np.ndarray:
+        rota = np.asarray(rota, dtype=np.intp)
+        return self.pares(rota[:-1], rota[1:])
+
+    def __getitem__(self, chave):
+        if not isinstance(chave, tuple):
+            return _Linha(self, chave)
+
+        origens, destinos = chave
+        if np.ndim(origens) == 0 and np.ndim(destinos) == 0:
+            return self.distancia(int(origens), int(destinos))
+        return self.pares(np.asarray(origens, dtype=np.intp), np.asarray(destinos, dtype=np.intp))
+
+
+class MatrizDensa(ProvedorDistancias):
+    # A matriz N×N de calcular_matriz_distancias (em memória ou memmap)
+    def __init__(self, matriz: np.ndarray):
+        self.matriz = matriz
+
+    def __len__(self) -> int:
+        return len(self.matriz)
+
+    def __getitem__(self, chave):
+        return self.matriz[chave]
+
+    def pares(self, origens: np.ndarray, destinos: np.ndarray) -> np.ndarray:
+        return self.matriz[origens, destinos]
+
+    def distancia(self, origem: int, destino: int) -> np.float64:
+        return self.matriz[origem, destino]
+
+    def linhas(self, inicio: int, fim: int) -> np.ndarray:
+        return np.asarray(self.matriz[inicio:fim])
+
+
+class OraculoCoordenadas(ProvedorDistancias):
+    # Calcula cada distância na hora a partir das coordenadas, com a mesma conta (e os mesmos
+    # valores em float64) de calcular_matriz_distancias, sem guardar nada além das coordenadas
+    def __init__(self, local_cidades: List[Tuple[int, int]]):
+        self.coordenadas = np.asarray(local_cidades, dtype=np.float64).reshape(-1, 2)
+        self._coordenadas = self.coordenadas.tolist() # Distâncias avulsas sem passar por arrays
+
+    def __len__(self) -> int:
+        return len(self.coordenadas)
+
+    def distancia(self, origem: int, destino: int) -> np.float64:
+        (x1, y1), (x2, y2) = self._coordenadas[origem], self._coordenadas[destino]
+        dx = x2 - x1
+        dy = y2 - y1
+        return np.float64(math.sqrt(dx * dx + dy * dy))
+
+    def pares(self, origens: np.ndarray, destinos: np.ndarray) -> np.ndarray:
+        diferenca = self.coordenadas[destinos] - self.coordenadas[origens]
+        dx = diferenca[..., 0]
+        dy = diferenca[..., 1]
+        return np.sqrt(dx * dx + dy * dy)
+
+    def linhas(self, inicio: int, fim: int) -> np.ndarray:
+        dx = self.coordenadas[None, :, 0] - self.coordenadas[inicio:fim, None, 0]
+        dy = self.coordenadas[None, :, 1] - self.coordenadas[inicio:fim, None, 1]
+        return np.sqrt(dx * dx + dy * dy)
+
+
+class CacheBlocos(ProvedorDistancias):
+    # Guarda os últimos `maximo_blocos` blocos (tamanho_bloco × tamanho_bloco) calculados por outro
+    # provedor; rotas com cidades próximas na numeração reaproveitam os mesmos blocos
+    def __init__(self, provedor: ProvedorDistancias, tamanho_bloco: int = 256, maximo_blocos: int = 64):
+        self.provedor = provedor
+        self.tamanho_bloco = tamanho_bloco
+        self.maximo_blocos = maximo_blocos
+        self.quantidade_blocos = -(-len(provedor) // tamanho_bloco)
+        self.acertos = 0
+        self.faltas = 0
+        self._blocos = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.provedor)
+
+    def __repr__(self):
+        return f"Blocos: {len(self._blocos)}/{self.maximo_blocos}, Acertos: {self.acertos}, Faltas: {self.faltas}"
+
+    def _bloco(self, chave: int) -> np.ndarray:
+        bloco = self._blocos.get(chave)
+        if bloco is not None:
+            self.acertos += 1
+            self._blocos.move_to_end(chave)
+            return bloco
+
+        self.faltas += 1
+        linha, coluna = divmod(chave, self.quantidade_blocos)
+        total = len(self)
+        origens = np.arange(linha * self.tamanho_bloco, min((linha + 1) * self.tamanho_bloco, total))
+        destinos = np.arange(coluna * self.tamanho_bloco, min((coluna + 1) * self.tamanho_bloco, total))
+        bloco = self.provedor.pares(
+            np.repeat(origens, len(destinos)), np.tile(destinos, len(origens))
+        ).reshape(len(origens), len(destinos))
+
+        self._blocos[chave] = bloco
+        if len(self._blocos) > self.maximo_blocos:
+            self._blocos.popitem(last=False)
+        return bloco
+
+    def distancia(self, origem: int, destino: int) -> np.float64:
+        bloco = self._bloco((origem // self.tamanho_bloco) * self.quantidade_blocos + destino // self.tamanho_bloco)
+        return bloco[origem % self.tamanho_bloco, destino % self.tamanho_bloco]
+
+    def pares(self, origens: np.ndarray, destinos: np.ndarray) -> np.ndarray:
+        origens = np.asarray(origens, dtype=np.intp)
+        destinos = np.asarray(destinos, dtype=np.intp)
+        resultado = np.empty(origens.shape, dtype=np.float64)
+
+        planos_origens = origens.ravel()
+        planos_destinos = destinos.ravel()
+        planos_resultado = resultado.reshape(-1)
+
+        # Agrupa os pares por bloco para buscar cada bloco uma vez só
+        chaves = (planos_origens // self.tamanho_bloco) * self.quantidade_blocos + planos_destinos // self.tamanho_bloco
+        ordem = np.argsort(chaves, kind="stable")
+        chaves_ordenadas = chaves[ordem]
+        inicios = np.flatnonzero(np.r_[True, chaves_ordenadas[1:] != chaves_ordenadas[:-1]]) if len(chaves) else []
+
+        for inicio, fim in zip(inicios, list(inicios[1:]) + [len(chaves)]):
+            indices = ordem[inicio:fim]
+            bloco = self._bloco(int(chaves_ordenadas[inicio]))
+            planos_resultado[indices] = bloco[
+                planos_origens[indices] % self.tamanho_bloco, planos_destinos[indices] % self.tamanho_bloco
+            ]
+        return resultado
+
+
+def como_provedor(dist_matrix: Union[np.ndarray, ProvedorDistancias]) -> ProvedorDistancias:
+    if isinstance(dist_matrix, ProvedorDistancias):
+        return dist_matrix
+    return MatrizDensa(np.asarray(dist_matrix))
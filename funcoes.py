@@ -1,72 +1,213 @@
+import functools
+import hashlib
+import os
 import random
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
 import numpy as np
-import pygame
-from tipos import Individuo
-import matplotlib.pyplot as plt
-import matplotlib.backends.backend_agg as agg
+from distancias import OraculoCoordenadas
+from selecao import Roleta
+from tipos import Individuo, Populacao
 
+# pygame só é importado pelas funções de desenho, para que o GA rode sem interface gráfica
+if TYPE_CHECKING:
+    import pygame
+
+
+def _assinatura_coordenadas(coordenadas: np.ndarray, dtype) -> str:
+    # Hash das coordenadas (float64) e do dtype da matriz, gravado ao lado do .npy
+    conteudo = np.dtype(dtype).str.encode() + np.ascontiguousarray(coordenadas, dtype=np.float64).tobytes()
+    return hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+
+def _arquivo_assinatura(caminho: str) -> str:
+    return caminho + ".coordenadas"
 
-def calcular_matriz_distancias(
-    local_cidades: List[Tuple[int, int]]
-) -> List[List[float]]:
-    dist_matrix = np.zeros((len(local_cidades), len(local_cidades)))
 
-    for i in range(len(local_cidades)):
-        for j in range(len(local_cidades)):
-            x1, y1 = local_cidades[i]
-            x2, y2 = local_cidades[j]
-            distance = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-            dist_matrix[i][j] = distance
+def _matriz_confere(dist_matrix: np.ndarray, caminho: str, assinatura: str, quantidade: int, dtype) -> bool:
+    if dist_matrix.shape != (quantidade, quantidade) or dist_matrix.dtype != np.dtype(dtype):
+        return False
+
+    # A matriz só vale para as mesmas coordenadas: confere o hash gravado junto com ela
+    try:
+        with open(_arquivo_assinatura(caminho), encoding="ascii") as arquivo:
+            return arquivo.read().strip() == assinatura
+    except OSError:
+        return False
+
+
+def calcular_matriz_distancias(
+    local_cidades: List[Tuple[int, int]],
+    dtype=np.float64,
+    caminho: Optional[str] = None,
+    tamanho_bloco: int = 256,
+) -> np.ndarray:
+    oraculo = OraculoCoordenadas(local_cidades)
+    coordenadas = oraculo.coordenadas
+    quantidade = len(coordenadas)
+
+    if caminho is None:
+        dist_matrix = np.empty((quantidade, quantidade), dtype=dtype)
+    else:
+        # Reaproveita a matriz gravada em disco por uma execução anterior se ela bater com estas cidades
+        assinatura = _assinatura_coordenadas(coordenadas, dtype)
+        if os.path.exists(caminho):
+            dist_matrix = np.load(caminho, mmap_mode="r")
+            if _matriz_confere(dist_matrix, caminho, assinatura, quantidade, dtype):
+                return dist_matrix
+            del dist_matrix
+
+        # Sem assinatura enquanto a matriz é escrita: uma escrita interrompida nunca é reaproveitada
+        if os.path.exists(_arquivo_assinatura(caminho)):
+            os.remove(_arquivo_assinatura(caminho))
+        dist_matrix = np.lib.format.open_memmap(caminho, mode="w+", dtype=dtype, shape=(quantidade, quantidade))
+
+    # Calcula em blocos de linhas para limitar a memória temporária em instâncias grandes
+    for inicio in range(0, quantidade, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, quantidade)
+        dist_matrix[inicio:fim] = oraculo.linhas(inicio, fim)
+
+    if caminho is not None:
+        dist_matrix.flush()
+        del dist_matrix
+        with open(_arquivo_assinatura(caminho), "w", encoding="ascii") as arquivo:
+            arquivo.write(assinatura + "\n")
+        dist_matrix = np.load(caminho, mmap_mode="r")
 
     return dist_matrix
 
 
+def como_semente(semente: Union[None, int, np.random.SeedSequence]) -> np.random.SeedSequence:
+    if isinstance(semente, np.random.SeedSequence):
+        return semente
+    return np.random.SeedSequence(semente)
+
+
+def gerador_python(semente: Union[None, int, np.random.SeedSequence]) -> random.Random:
+    # random.Random para os operadores abaixo, semeado com 128 bits de um SeedSequence. Sementes de
+    # processos, ilhas ou threads diferentes saem de SeedSequence.spawn e não se sobrepõem.
+    estado = como_semente(semente).generate_state(4, np.uint32)
+    return random.Random(int.from_bytes(estado.tobytes(), "little"))
+
+
+# Os operadores recebem o gerador em `rng` (random.Random); sem ele usam o módulo random global
 def gerar_populacao(
     local_cidades: List[Tuple[int, int]],
     maximo_veiculos: int,
     capacidade_maxima: int,
     tamanho_populacao: int,
+    rng: random.Random = random,
 ) -> List[Individuo]:
     populacao = []
     for _ in range(tamanho_populacao):
-        veiculo = random.randint(1, maximo_veiculos)
-        capacidade = random.randint(1, capacidade_maxima)
+        veiculo = rng.randint(1, maximo_veiculos)
+        capacidade = rng.randint(1, capacidade_maxima)
 
-        rota = random.sample(range(len(local_cidades)), len(local_cidades))
+        rota = rng.sample(range(len(local_cidades)), len(local_cidades))
         individuo = Individuo(veiculo, capacidade, rota)
 
         populacao.append(individuo)
     return populacao
 
 
-def order_crossover(pai1: Individuo, pai2: Individuo) -> Individuo:
+def gerar_populacao_lote(
+    local_cidades: List[Tuple[int, int]],
+    maximo_veiculos: int,
+    capacidade_maxima: int,
+    tamanho_populacao: int,
+    rng: Optional[np.random.Generator] = None,
+    populacao: Optional[Populacao] = None,
+    inicio: int = 0,
+) -> Populacao:
+    # Mesma distribuição de gerar_populacao, mas com o lote inteiro sorteado pelo NumPy e escrito
+    # direto nas linhas [inicio, inicio + tamanho_populacao) de `populacao` (alocada se não vier)
+    if rng is None:
+        rng = np.random.default_rng()
+    if populacao is None:
+        populacao = Populacao(inicio + tamanho_populacao, len(local_cidades))
+
+    fim = inicio + tamanho_populacao
+
+    # Fisher-Yates em lote: cada linha começa como 0..N-1 e é embaralhada no próprio buffer
+    rotas = populacao.rotas[inicio:fim]
+    rotas[:] = np.arange(rotas.shape[1], dtype=rotas.dtype)
+    rng.permuted(rotas, axis=1, out=rotas)
+
+    populacao.veiculos[inicio:fim] = rng.integers(1, maximo_veiculos, size=tamanho_populacao, endpoint=True)
+    populacao.capacidade[inicio:fim] = rng.integers(1, capacidade_maxima, size=tamanho_populacao, endpoint=True)
+    populacao.fitness[inicio:fim] = np.nan
+    return populacao
+
+
+def order_crossover(pai1: Individuo, pai2: Individuo, rng: random.Random = random) -> Individuo:
 
     tamanho = len(pai1.rota)
 
-    start_index = random.randint(0, tamanho - 1)
-    end_index = random.randint(start_index + 1, tamanho)
+    start_index = rng.randint(0, tamanho - 1)
+    end_index = rng.randint(start_index + 1, tamanho)
+
+    # Pais vindos de uma Populacao têm a rota como view NumPy; o filho sempre recebe int do Python
+    rota1 = pai1.rota.tolist() if isinstance(pai1.rota, np.ndarray) else pai1.rota
+    rota2 = pai2.rota.tolist() if isinstance(pai2.rota, np.ndarray) else pai2.rota
+
+    # O filho é montado num buffer pré-alocado; `herdado` marca os genes que já vieram do pai1
+    rota = [0] * tamanho
+    rota[start_index:end_index] = rota1[start_index:end_index]
+
+    herdado = bytearray(tamanho)
+    for gene in rota[start_index:end_index]:
+        herdado[gene] = 1
+
+    # Os genes restantes entram na ordem do pai2, pulando o trecho herdado
+    posicao = 0
+    for gene in rota2:
+        if herdado[gene]:
+            continue
+        if posicao == start_index:
+            posicao = end_index
+        rota[posicao] = gene
+        posicao += 1
 
-    filho = Individuo(pai1.veiculos, pai1.capacidade, [])
+    return Individuo(pai1.veiculos, pai1.capacidade, rota)
 
-    filho.rota.extend(pai1.rota[start_index:end_index])
 
-    remaining_positions = [
-        i for i in range(tamanho) if i < start_index or i >= end_index
-    ]
-    remaining_genes = [gene for gene in pai2.rota if gene not in filho.rota]
+def order_crossover_lote(
+    rotas: np.ndarray,
+    indices_pai1: np.ndarray,
+    indices_pai2: np.ndarray,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    # Mesmo operador de order_crossover para vários filhos de uma vez: o filho k vem de
+    # rotas[indices_pai1[k]] e rotas[indices_pai2[k]]; veículos e capacidade são os do pai1
+    if rng is None:
+        rng = np.random.default_rng()
 
-    for position, gene in zip(remaining_positions, remaining_genes):
-        filho.rota.insert(position, gene)
+    pais1 = rotas[indices_pai1]
+    pais2 = rotas[indices_pai2]
+    quantidade, tamanho = pais1.shape
 
-    return filho
+    start_index = rng.integers(0, tamanho, size=quantidade)
+    end_index = rng.integers(start_index + 1, tamanho + 1)
 
+    posicoes = np.arange(tamanho)
+    no_trecho = (posicoes >= start_index[:, None]) & (posicoes < end_index[:, None])
 
-def mutate(solution: Individuo, mutation_probability: float) -> Individuo:
-    if random.random() < mutation_probability:
-        index1 = random.randint(0, len(solution.rota) - 1)
-        index2 = random.randint(0, len(solution.rota) - 1)
+    linhas = np.arange(quantidade)[:, None]
+    herdado = np.zeros((quantidade, tamanho), dtype=bool)
+    herdado[linhas, pais1] = no_trecho
+
+    # Cada linha tem tantos genes restantes do pai2 quanto posições fora do trecho, então a
+    # indexação booleana (linha a linha, da esquerda para a direita) alinha uns com os outros
+    filhos = np.empty_like(pais1)
+    filhos[no_trecho] = pais1[no_trecho]
+    filhos[~no_trecho] = pais2[~herdado[linhas, pais2]]
+    return filhos
+
+
+def mutate(solution: Individuo, mutation_probability: float, rng: random.Random = random) -> Individuo:
+    if rng.random() < mutation_probability:
+        index1 = rng.randint(0, len(solution.rota) - 1)
+        index2 = rng.randint(0, len(solution.rota) - 1)
 
         solution.rota[index1], solution.rota[index2] = (
             solution.rota[index2],
@@ -76,14 +217,25 @@ def mutate(solution: Individuo, mutation_probability: float) -> Individuo:
     return solution
 
 # Função para inicializar a tela do Pygame
-def init_screen(width: int, height: int, caption: str) -> pygame.Surface:
+def init_screen(width: int, height: int, caption: str) -> "pygame.Surface":
+    import pygame
+
     pygame.init()
     screen = pygame.display.set_mode((width, height))
     pygame.display.set_caption(caption)
     return screen
 
+@functools.lru_cache(maxsize=None)
+def _fonte(tamanho: int = 20) -> "pygame.font.Font":
+    import pygame
+
+    pygame.font.init()
+    return pygame.font.Font(None, tamanho)
+
+# Para desenhar a cada geração prefira visualizacao.RenderizadorRotas, que guarda o fundo e os rótulos
 def desenhar_rotas(screen, melhor_rota, armazens):
-    
+    import pygame
+
     # Cores
     WHITE = (255, 255, 255)
     BLACK = (0, 0, 0)
@@ -93,7 +245,7 @@ def desenhar_rotas(screen, melhor_rota, armazens):
     # Limpa a tela
     screen.fill(BLACK)
 
-    font = pygame.font.Font(None, 20)
+    font = _fonte()
     
     # Desenha os pontos (dots) na tela
     for armazem in armazens:
@@ -104,27 +256,20 @@ def desenhar_rotas(screen, melhor_rota, armazens):
         text_rect = text.get_rect(center=(x - 15, y - 15))
         screen.blit(text, text_rect)
     
-    # Desenha as linhas da melhor rota
-    for i in range(len(melhor_rota)):
-        cidade_atual = melhor_rota[i]
-        proxima_cidade = melhor_rota[(i + 1) % len(melhor_rota)]
-        # print(i, (i+1), cidade_atual, proxima_cidade)
-        pygame.draw.line(
-            screen,
-            RED,
-            armazens[cidade_atual].localizacao,
-            armazens[proxima_cidade].localizacao,
-            2,
-        )
+    # Desenha as linhas da melhor rota (fechada) de uma vez
+    if len(melhor_rota) > 1:
+        pygame.draw.lines(screen, RED, True, [armazens[cidade].localizacao for cidade in melhor_rota], 2)
+    for i, cidade_atual in enumerate(melhor_rota):
         text = font.render(f"({i + 1})", True, WHITE)
         x, y = armazens[cidade_atual].localizacao
         text_rect = text.get_rect(center=(x - 20, y - 30))
         screen.blit(text, text_rect)
 
-    pygame.display.flip()  # Atualiza a tela
+# Atualiza a tela: chamada depois de desenhar_rotas, é o único flip do quadro
+def desenhar_info(screen, geracao, melhor_tempo, melhor_individuo, metodo_selecao_escolhido=None):
+    import pygame
 
-def desenhar_info(screen, geracao, melhor_tempo, melhor_individuo, metodo_selecao_escolhido):
-    font = pygame.font.Font(None, 20)
+    font = _fonte()
     GREEN = (0, 255, 0)
 
     text = font.render(f"Geração: {geracao}", True, GREEN)  
@@ -136,19 +281,19 @@ def desenhar_info(screen, geracao, melhor_tempo, melhor_individuo, metodo_seleca
         screen.blit(text, (10, 720))
         text = font.render(f"Melhor tempo: {melhor_tempo}", True, GREEN)
         screen.blit(text, (10, 540))
-        pygame.display.flip()
+    pygame.display.flip()
 
     
-def metodo_selecao_aleatorio(populacao_fitness): #elitista aleatorio (aleatorio entre os 10 melhores)
-    pai1_fitness, pai2_fitness = random.choices(populacao_fitness[:10], k=2)
+def metodo_selecao_aleatorio(populacao_fitness, rng=random): #elitista aleatorio (aleatorio entre os 10 melhores)
+    pai1_fitness, pai2_fitness = rng.choices(populacao_fitness[:10], k=2)
     pai1 = pai1_fitness[0]
     pai2 = pai2_fitness[0]
     return pai1, pai2
 
-def metodo_selecao_torneio(populacao_fitness):
+def metodo_selecao_torneio(populacao_fitness, rng=random):
     def torneio(populacao_fitness):
         tamanho_torneio = 3 # Tamanho do torneio igual a 3 competidores
-        competidores = random.sample(populacao_fitness, tamanho_torneio)
+        competidores = rng.sample(populacao_fitness, tamanho_torneio)
         competidores.sort(key=lambda x: x[1])  # Ordena por fitness
         return competidores[0][0]  # Retorna o melhor competidor
 
@@ -156,41 +301,24 @@ def metodo_selecao_torneio(populacao_fitness):
     pai2 = torneio(populacao_fitness[:10])
     return pai1, pai2
 
-def metodo_selecao_roleta(populacao_fitness):
-    # Calcula a soma total dos fitness para calcular as probabilidades
-    soma_fitness = sum(fitness for _, fitness in populacao_fitness)
-
-    # Seleciona aleatoriamente um valor de fitness
-    valor_selecionado = random.uniform(0, soma_fitness)
-    acumulado = 0.0
-
-    pai1 = None
-    pai2 = None
-
-    for individuo, fitness in populacao_fitness:
-        acumulado += fitness
-        if acumulado >= valor_selecionado and pai1 is None:
-            pai1 = individuo
-
-    # Seleciona o segundo pai de forma semelhante ao primeiro, garantindo que sejam diferentes
-    while True:
-        valor_selecionado = random.uniform(0, soma_fitness)
-        acumulado = 0.0
-
-        for individuo, fitness in populacao_fitness:
-            acumulado += fitness
-            if acumulado >= valor_selecionado and individuo != pai1:
-                pai2 = individuo
-                return pai1, pai2  # Retorna os pais selecionados
+def roleta_geracao(populacao_fitness) -> Roleta:
+    # Tabela acumulada (O(P)) da roleta; monte uma por geração e passe em metodo_selecao_roleta
+    return Roleta([fitness for _, fitness in populacao_fitness])
 
-    return pai1, pai2  # Caso não encontre um segundo pai válido, retorna None para ambos
+def metodo_selecao_roleta(populacao_fitness, rng=random, roleta: Optional[Roleta] = None):
+    # Fatias maiores para tempos menores e segundo pai sempre diferente do primeiro (ver selecao.Roleta).
+    # Sem `roleta` a tabela é montada a cada chamada; com ela cada sorteio é só a busca binária.
+    if roleta is None:
+        roleta = roleta_geracao(populacao_fitness)
+    pai1, pai2 = roleta.sortear_par(rng)
+    return populacao_fitness[pai1][0], populacao_fitness[pai2][0]
 
-def metodo_selecao_rank(populacao_fitness):
+def metodo_selecao_rank(populacao_fitness, rng=random):
     populacao_ordenada = sorted(populacao_fitness[:10], key=lambda x: x[1])
     ranks = list(range(1, len(populacao_ordenada) + 1))
     total_ranks = sum(ranks)
-    pick1 = random.uniform(0, total_ranks)
-    pick2 = random.uniform(0, total_ranks)
+    pick1 = rng.uniform(0, total_ranks)
+    pick2 = rng.uniform(0, total_ranks)
 
     current = 0
     for rank, (individuo, _) in zip(ranks, populacao_ordenada):
@@ -208,17 +336,17 @@ def metodo_selecao_rank(populacao_fitness):
 
     return pai1, pai2
 
-def metodo_selecao_elitismo(populacao_fitness):
+def metodo_selecao_elitismo(populacao_fitness, rng=random): # Determinístico; rng só para manter a mesma assinatura
     populacao_ordenada = sorted(populacao_fitness, key=lambda x: x[1])
     pai1 = populacao_ordenada[0][0]
     pai2 = populacao_ordenada[1][0]
     return pai1, pai2
 
-def metodo_selecao_truncamento(populacao_fitness):
+def metodo_selecao_truncamento(populacao_fitness, rng=random):
     porcentagem = 0.5
     n_selecionados = int(len(populacao_fitness) * porcentagem)
     populacao_truncada = populacao_fitness[:n_selecionados]
-    pai1_fitness, pai2_fitness = random.choices(populacao_truncada, k=2)
+    pai1_fitness, pai2_fitness = rng.choices(populacao_truncada, k=2)
     pai1 = pai1_fitness[0]
     pai2 = pai2_fitness[0]
     return pai1, pai2
\ No newline at end of file
@@ -0,0 +1,262 @@
+import argparse
+import multiprocessing
+import queue
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from funcoes import como_semente
+from solver import AlgoritmoGenetico, instancia_padrao
+from tipos import Individuo, Populacao
+
+# Modelo de ilhas: cada ilha é um AlgoritmoGenetico independente num processo próprio, rodando o
+# laço de gerações normal. A cada `intervalo_migracao` gerações cada ilha manda seus `migrantes`
+# melhores para outra ilha (anel fixo ou anel sorteado a cada época) e recebe os de uma ilha,
+# que tomam o lugar dos seus piores. Fora das migrações as ilhas não esperam umas pelas outras.
+
+TOPOLOGIAS = ("anel", "aleatoria")
+
+
+class EstatisticaIlha:
+    def __init__(self, ilha: int, geracao: int, melhor_tempo: float, tempo_medio: float, avaliacoes: int, recebidos: int):
+        self.ilha = ilha
+        self.geracao = geracao
+        self.melhor_tempo = melhor_tempo # Melhor fitness encontrado pela ilha até esta geração
+        self.tempo_medio = tempo_medio # Fitness médio da população da geração
+        self.avaliacoes = avaliacoes
+        self.recebidos = recebidos # Migrantes recebidos desde o início
+
+    def __repr__(self):
+        return (
+            f"Ilha: {self.ilha} Geração: {self.geracao} Melhor tempo: {self.melhor_tempo} "
+            f"Tempo médio: {self.tempo_medio:.2f} Avaliações: {self.avaliacoes} Recebidos: {self.recebidos}"
+        )
+
+
+def _empacotar(individuos: List[Individuo], fitness: List[float]):
+    # Migrantes viajam como arrays compactos: rotas (M, N), veículos, capacidade e fitness
+    populacao = Populacao.de_individuos(individuos)
+    return populacao.rotas, populacao.veiculos, populacao.capacidade, np.asarray(fitness, dtype=np.float64)
+
+
+def _desempacotar(mensagem) -> List[Individuo]:
+    rotas, veiculos, capacidade, _ = mensagem
+    return [Individuo(int(v), int(c), r) for v, c, r in zip(veiculos, capacidade, rotas.tolist())]
+
+
+def _destinos(quantidade_ilhas: int, topologia: str, rng: np.random.Generator) -> List[int]:
+    # destinos[i] é a ilha que recebe os migrantes de i; sempre uma permutação, então cada ilha
+    # recebe exatamente uma mensagem por época
+    ordem = rng.permutation(quantidade_ilhas) if topologia == "aleatoria" else np.arange(quantidade_ilhas)
+    destinos = [0] * quantidade_ilhas
+    for posicao, ilha in enumerate(ordem.tolist()):
+        destinos[ilha] = int(ordem[(posicao + 1) % quantidade_ilhas])
+    return destinos
+
+
+def _receber(entrada, epoca: int, pendentes: Dict[int, tuple]):
+    # Uma ilha rápida pode mandar a mensagem da época seguinte antes da ilha lenta desta época
+    while epoca not in pendentes:
+        epoca_mensagem, mensagem = entrada.get()
+        pendentes[epoca_mensagem] = mensagem
+    return pendentes.pop(epoca)
+
+
+def _executar_ilha(
+    indice: int,
+    parametros: dict,
+    semente: np.random.SeedSequence,
+    semente_topologia: np.random.SeedSequence,
+    total_geracoes: int,
+    intervalo_migracao: int,
+    migrantes: int,
+    topologia: str,
+    entradas: list,
+    resultados,
+):
+    rng_topologia = np.random.default_rng(semente_topologia) # Igual em todas as ilhas
+
+    ag = None
+    pendentes = {}
+    recebidos = 0
+    melhor_tempo = None
+    melhor_individuo = None
+
+    try:
+        ag = AlgoritmoGenetico(semente=semente, **parametros) # Dentro do try: um erro aqui também chega ao pai
+        for geracao in range(1, total_geracoes + 1):
+            evento = ag.passo()
+            if melhor_tempo is None or evento.melhor_tempo < melhor_tempo:
+                melhor_tempo = evento.melhor_tempo
+                melhor_individuo = evento.melhor_individuo
+
+            migrar = len(entradas) > 1 and migrantes > 0 and geracao % intervalo_migracao == 0 and geracao < total_geracoes
+            if migrar or geracao == total_geracoes:
+                resultados.put((
+                    "estatistica",
+                    EstatisticaIlha(
+                        indice, geracao, melhor_tempo, float(np.mean(evento.selecao.fitness)), ag.cache_fitness.faltas, recebidos
+                    ),
+                ))
+
+            if not migrar:
+                continue
+
+            epoca = geracao // intervalo_migracao
+            destino = _destinos(len(entradas), topologia, rng_topologia)[indice]
+            selecao = evento.selecao
+            melhores = selecao.melhores(migrantes).tolist()
+            entradas[destino].put((epoca, _empacotar([selecao.populacao[i] for i in melhores], selecao.fitness[melhores])))
+
+            # Os imigrantes substituem os piores da próxima geração (já avaliada pelo cache, então a
+            # avaliação do próximo passo só repete os acertos)
+            imigrantes = _desempacotar(_receber(entradas[indice], epoca, pendentes))
+            fitness = np.asarray(ag.cache_fitness.avaliar_populacao(ag.populacao))
+            piores = np.argsort(fitness, kind="stable")[::-1][: len(imigrantes)].tolist()
+            for posicao, imigrante in zip(piores, imigrantes):
+                ag.populacao[posicao] = imigrante
+            recebidos += len(imigrantes)
+
+        resultados.put(("fim", indice, melhor_tempo, _empacotar([melhor_individuo], [melhor_tempo])))
+    except BaseException as erro:
+        resultados.put(("erro", indice, repr(erro)))
+        raise
+    finally:
+        if ag is not None:
+            ag.fechar()
+
+
+class ModeloIlhas:
+    def __init__(
+        self,
+        quantidade_ilhas: int = 4,
+        intervalo_migracao: int = 10,
+        migrantes: int = 5,
+        topologia: str = "anel",
+        semente: Union[None, int, np.random.SeedSequence] = None,
+        **parametros_ag,
+    ):
+        if topologia not in TOPOLOGIAS:
+            raise ValueError(f"Topologia desconhecida: {topologia}")
+        if parametros_ag.get("processos", 1) > 1:
+            # Cada ilha já é um processo daemon, e processos daemon não podem abrir um Pool
+            raise ValueError("As ilhas não aceitam processos > 1: o paralelismo é uma ilha por processo")
+
+        self.quantidade_ilhas = quantidade_ilhas
+        self.intervalo_migracao = max(intervalo_migracao, 1)
+        self.migrantes = migrantes
+        self.topologia = topologia
+        self.semente = semente
+        self.parametros_ag = parametros_ag # Repassados a AlgoritmoGenetico em cada ilha (sem semente)
+
+        self.estatisticas: List[List[EstatisticaIlha]] = [[] for _ in range(quantidade_ilhas)]
+        self.melhores_tempos: List[Optional[float]] = [None] * quantidade_ilhas
+        self.melhor_individuo = None
+        self.melhor_tempo = None
+        self.melhor_ilha = None
+
+    def executar(
+        self, total_geracoes: int, observador: Optional[Callable[[EstatisticaIlha], None]] = None
+    ) -> Individuo:
+        # Sementes independentes por ilha derivadas de uma só, mais uma comum para sortear a topologia
+        *sementes, semente_topologia = como_semente(self.semente).spawn(self.quantidade_ilhas + 1)
+
+        contexto = multiprocessing.get_context()
+        entradas = [contexto.Queue() for _ in range(self.quantidade_ilhas)]
+        resultados = contexto.Queue()
+        processos = [
+            contexto.Process(
+                target=_executar_ilha,
+                args=(
+                    indice, self.parametros_ag, sementes[indice], semente_topologia, total_geracoes,
+                    self.intervalo_migracao, self.migrantes, self.topologia, entradas, resultados,
+                ),
+                daemon=True,
+            )
+            for indice in range(self.quantidade_ilhas)
+        ]
+        for processo in processos:
+            processo.start()
+
+        try:
+            ativas = self.quantidade_ilhas
+            while ativas:
+                try:
+                    mensagem = resultados.get(timeout=1)
+                except queue.Empty:
+                    if any(processo.exitcode not in (None, 0) for processo in processos):
+                        raise RuntimeError("Uma das ilhas terminou com erro")
+                    continue
+
+                if mensagem[0] == "estatistica":
+                    estatistica = mensagem[1]
+                    self.estatisticas[estatistica.ilha].append(estatistica)
+                    if observador is not None:
+                        observador(estatistica)
+                elif mensagem[0] == "fim":
+                    _, indice, tempo, pacote = mensagem
+                    ativas -= 1
+                    self.melhores_tempos[indice] = tempo
+                    # Empate fica com a ilha de menor índice, independente da ordem de chegada
+                    if self.melhor_tempo is None or (tempo, indice) < (self.melhor_tempo, self.melhor_ilha):
+                        self.melhor_tempo = tempo
+                        self.melhor_ilha = indice
+                        self.melhor_individuo = _desempacotar(pacote)[0]
+                else:
+                    raise RuntimeError(f"Ilha {mensagem[1]} terminou com erro: {mensagem[2]}")
+        except BaseException:
+            for processo in processos:
+                processo.terminate()
+            raise
+        finally:
+            for processo in processos:
+                processo.join()
+
+        return self.melhor_individuo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distribuição de carga em armazéns - GA em modelo de ilhas")
+    parser.add_argument("--ilhas", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--geracoes", type=int, default=1000)
+    parser.add_argument("--populacao", type=int, default=500, help="Tamanho da população de cada ilha")
+    parser.add_argument("--veiculos", type=int, default=10, help="Quantidade máxima de veículos")
+    parser.add_argument("--capacidade", type=int, default=50, help="Capacidade máxima de cada veículo")
+    parser.add_argument("--mutacao", type=float, default=0.7)
+    parser.add_argument("--intervalo-migracao", type=int, default=10, help="Gerações entre migrações")
+    parser.add_argument("--migrantes", type=int, default=5, help="Melhores indivíduos enviados a cada migração")
+    parser.add_argument("--topologia", choices=TOPOLOGIAS, default="anel")
+    parser.add_argument("--semente", type=int, default=34)
+    args = parser.parse_args()
+
+    from funcoes import calcular_matriz_distancias
+
+    semente_instancia, semente_ilhas = np.random.SeedSequence(args.semente).spawn(2)
+    LOCAL_CIDADES, ESTOQUE_MINIMO_CIDADES = instancia_padrao(semente_instancia)
+
+    modelo = ModeloIlhas(
+        args.ilhas,
+        args.intervalo_migracao,
+        args.migrantes,
+        args.topologia,
+        semente_ilhas,
+        local_cidades=LOCAL_CIDADES,
+        capacidade_armazem_cidades=ESTOQUE_MINIMO_CIDADES,
+        dist_matrix=calcular_matriz_distancias(LOCAL_CIDADES),
+        tamanho_populacao=args.populacao,
+        maximo_veiculos=args.veiculos,
+        capacidade_maxima=args.capacidade,
+        probabilidade_mutacao=args.mutacao,
+    )
+    melhor_individuo = modelo.executar(args.geracoes, print)
+
+    for indice, tempo in enumerate(modelo.melhores_tempos):
+        print(f"Ilha: {indice} Melhor tempo: {tempo}")
+    print(
+        f"Melhor ilha: {modelo.melhor_ilha} Melhor indivíduo: {melhor_individuo} "
+        f"Melhor tempo: {modelo.melhor_tempo} Rota: {np.asarray(melhor_individuo.rota).tolist()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import weakref
+from multiprocessing import shared_memory
+from typing import List, Optional, Union
+
+import numpy as np
+
+from avaliacao import calcular_fitness_lote
+from distancias import CacheBlocos, MatrizDensa, OraculoCoordenadas, ProvedorDistancias, como_provedor
+from tipos import Individuo
+
+# Dados de cada processo trabalhador, preenchidos uma única vez por _iniciar_trabalhador
+_memorias = []
+_dist_matrix = None
+_estoque = None
+
+
+def _anexar(nome: str, formato, dtype) -> np.ndarray:
+    # Só anexa o bloco; quem o criou é responsável por liberá-lo
+    memoria = shared_memory.SharedMemory(name=nome)
+    _memorias.append(memoria)
+    return np.ndarray(formato, dtype=dtype, buffer=memoria.buf)
+
+
+def _iniciar_trabalhador(nome_dist, formato_dist, dtype_dist, nome_estoque, formato_estoque, coordenadas=False):
+    global _dist_matrix, _estoque
+    _dist_matrix = _anexar(nome_dist, formato_dist, dtype_dist)
+    if coordenadas:
+        _dist_matrix = OraculoCoordenadas(_dist_matrix)
+    _estoque = _anexar(nome_estoque, formato_estoque, np.int64)
+
+
+def _avaliar_pedaco(pedaco) -> np.ndarray:
+    rotas, veiculos, capacidade = pedaco
+    return calcular_fitness_lote(rotas, veiculos, capacidade, _estoque, _dist_matrix)
+
+
+def _dados_distancias(dist_matrix: Union[np.ndarray, ProvedorDistancias]):
+    # O que vai para a memória compartilhada: a matriz densa ou, para o oráculo, só as coordenadas.
+    # O cache de blocos não é compartilhado; cada trabalhador calcula as distâncias do provedor de baixo.
+    provedor = como_provedor(dist_matrix)
+    while isinstance(provedor, CacheBlocos):
+        provedor = provedor.provedor
+
+    if isinstance(provedor, MatrizDensa):
+        return np.ascontiguousarray(provedor.matriz), False
+    if isinstance(provedor, OraculoCoordenadas):
+        return provedor.coordenadas, True
+    raise TypeError(f"Provedor de distâncias não suportado em paralelo: {type(provedor).__name__}")
+
+
+def _compartilhar(array: np.ndarray) -> shared_memory.SharedMemory:
+    memoria = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memoria.buf)[...] = array
+    return memoria
+
+
+def _liberar(pool, memorias):
+    pool.terminate()
+    pool.join()
+    for memoria in memorias:
+        memoria.close()
+        memoria.unlink()
+
+
+class AvaliadorParalelo:
+    # Avalia populações em um pool de processos; a matriz de distâncias e o estoque ficam em memória
+    # compartilhada e cada trabalhador recebe só as rotas (inteiros compactos) da sua fatia da população
+    def __init__(
+        self,
+        capacidade_armazem_cidades: List[int],
+        dist_matrix: Union[np.ndarray, ProvedorDistancias],
+        processos: Optional[int] = None,
+    ):
+        dist_matrix, coordenadas = _dados_distancias(dist_matrix)
+        estoque = np.asarray(capacidade_armazem_cidades, dtype=np.int64)
+
+        self.processos = processos or os.cpu_count() or 1
+        self.tipo_rota = np.uint16 if len(estoque) <= np.iinfo(np.uint16).max + 1 else np.int32
+
+        self._memorias = [_compartilhar(dist_matrix), _compartilhar(estoque)]
+        self._pool = multiprocessing.Pool(
+            self.processos,
+            initializer=_iniciar_trabalhador,
+            initargs=(
+                self._memorias[0].name, dist_matrix.shape, dist_matrix.dtype,
+                self._memorias[1].name, estoque.shape,
+                coordenadas,
+            ),
+        )
+        self._finalizador = weakref.finalize(self, _liberar, self._pool, self._memorias)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def fechar(self):
+        self._finalizador()
+
+    def avaliar_lote(self, rotas: np.ndarray, veiculos: np.ndarray, capacidade: np.ndarray) -> np.ndarray:
+        rotas = np.asarray(rotas, dtype=self.tipo_rota)
+        if not len(rotas):
+            return np.zeros(0)
+
+        # Uma fatia contígua por processo; o pool devolve os resultados na ordem da população
+        pedacos = zip(
+            np.array_split(rotas, self.processos),
+            np.array_split(np.asarray(veiculos, dtype=np.int64), self.processos),
+            np.array_split(np.asarray(capacidade, dtype=np.int64), self.processos),
+        )
+        pedacos = [pedaco for pedaco in pedacos if len(pedaco[0])]
+        return np.concatenate(self._pool.map(_avaliar_pedaco, pedacos, chunksize=1))
+
+    def avaliar_populacao(self, populacao: List[Individuo]) -> List[float]:
+        if not populacao:
+            return []
+
+        rotas = np.array([individuo.rota for individuo in populacao], dtype=self.tipo_rota)
+        veiculos = np.array([individuo.veiculos for individuo in populacao], dtype=np.int64)
+        capacidade = np.array([individuo.capacidade for individuo in populacao], dtype=np.int64)
+
+        return self.avaliar_lote(rotas, veiculos, capacidade).tolist()
@@ -0,0 +1,166 @@
+import bisect
+import itertools
+import random
+from typing import List, Tuple
+
+import numpy as np
+
+# Seleção de pais por índice: o fitness da geração fica num array NumPy e a elite é separada
+# uma única vez por geração; os métodos de seleção só sorteiam índices sobre ela, com o
+# random.Random recebido em `rng` (o módulo random global se não vier nenhum).
+
+
+def indices_melhores(valores: np.ndarray, quantidade: int, ordenados: bool = True) -> np.ndarray:
+    quantidade = min(quantidade, len(valores))
+    if quantidade <= 0:
+        return np.zeros(0, dtype=np.intp)
+
+    if quantidade < len(valores):
+        indices = np.argpartition(valores, quantidade - 1)[:quantidade]
+    else:
+        indices = np.arange(len(valores))
+
+    if ordenados:
+        # Empates ficam na ordem da população, como no sorted() estável
+        indices = indices[np.lexsort((indices, valores[indices]))]
+    return indices
+
+
+class Roleta:
+    # Roleta para minimização: o peso de cada indivíduo é 1 / (1 + fitness), então tempos menores
+    # ganham fatias maiores. A tabela acumulada é montada uma vez e cada sorteio é uma busca binária.
+    def __init__(self, fitness):
+        self.pesos = 1.0 / (1.0 + np.asarray(fitness, dtype=np.float64))
+        self.acumulado = np.cumsum(self.pesos)
+        self.total = float(self.acumulado[-1]) if len(self.acumulado) else 0.0
+
+    def __len__(self):
+        return len(self.pesos)
+
+    def _indices(self, valores):
+        # Primeiro índice cuja soma acumulada passa do valor sorteado
+        return np.minimum(np.searchsorted(self.acumulado, valores, side="right"), len(self.acumulado) - 1)
+
+    def sortear(self, rng: random.Random = random) -> int:
+        return int(self._indices(rng.random() * self.total))
+
+    def sortear_par(self, rng: random.Random = random) -> Tuple[int, int]:
+        pai1 = self.sortear(rng)
+        if len(self) < 2:
+            return pai1, pai1
+
+        # O segundo pai é sorteado na roleta sem a fatia do primeiro, então sai sempre diferente
+        # na primeira tentativa, com a mesma distribuição de sortear de novo até não repetir
+        peso = self.pesos[pai1]
+        inicio = self.acumulado[pai1] - peso
+        valor = rng.random() * (self.total - peso)
+        if valor >= inicio:
+            valor += peso
+
+        pai2 = int(self._indices(valor))
+        if pai2 == pai1: # Só acontece por arredondamento na borda da fatia
+            pai2 = pai1 + 1 if pai1 + 1 < len(self) else pai1 - 1
+        return pai1, pai2
+
+    def sortear_pares(self, quantidade: int, rng: np.random.Generator) -> np.ndarray:
+        # Todos os pares de pais de uma geração numa chamada: matriz (quantidade, 2) de índices
+        sorteios = rng.random((quantidade, 2))
+        pais1 = self._indices(sorteios[:, 0] * self.total)
+        if len(self) < 2:
+            return np.stack((pais1, pais1), axis=1)
+
+        pesos = self.pesos[pais1]
+        inicio = self.acumulado[pais1] - pesos
+        valores = sorteios[:, 1] * (self.total - pesos)
+        valores = np.where(valores >= inicio, valores + pesos, valores)
+
+        pais2 = self._indices(valores)
+        repetidos = pais2 == pais1
+        pais2[repetidos] = np.where(pais1[repetidos] + 1 < len(self), pais1[repetidos] + 1, pais1[repetidos] - 1)
+        return np.stack((pais1, pais2), axis=1)
+
+
+class SelecaoGeracao:
+    def __init__(self, populacao: List, fitness, tamanho_elite: int = 10):
+        self.populacao = populacao
+        self.fitness = np.asarray(fitness, dtype=np.float64)
+        self.elite = indices_melhores(self.fitness, tamanho_elite) # Índices dos melhores, do melhor para o pior
+        self._elite_lista = self.elite.tolist()
+        self._ranks_acumulados = None
+        self._truncados = None
+        self._roleta = None
+
+    def __len__(self):
+        return len(self.fitness)
+
+    @property
+    def melhor(self) -> int:
+        return self._elite_lista[0]
+
+    def melhores(self, quantidade: int, ordenados: bool = True) -> np.ndarray:
+        if quantidade <= len(self.elite):
+            return self.elite[:quantidade]
+        return indices_melhores(self.fitness, quantidade, ordenados)
+
+    def pais(self, indices: Tuple[int, int]):
+        return self.populacao[indices[0]], self.populacao[indices[1]]
+
+
+def selecionar_aleatorio(selecao: SelecaoGeracao, rng: random.Random = random) -> Tuple[int, int]: # aleatório entre os 10 melhores
+    pai1, pai2 = rng.choices(selecao._elite_lista, k=2)
+    return pai1, pai2
+
+
+def selecionar_torneio(selecao: SelecaoGeracao, rng: random.Random = random) -> Tuple[int, int]:
+    def torneio():
+        tamanho_torneio = 3 # Tamanho do torneio igual a 3 competidores
+        competidores = rng.sample(selecao._elite_lista, min(tamanho_torneio, len(selecao._elite_lista)))
+        return min(competidores, key=selecao.fitness.__getitem__) # Retorna o melhor competidor
+
+    return torneio(), torneio()
+
+
+def selecionar_roleta(selecao: SelecaoGeracao, rng: random.Random = random) -> Tuple[int, int]:
+    if selecao._roleta is None:
+        selecao._roleta = Roleta(selecao.fitness)
+    return selecao._roleta.sortear_par(rng)
+
+
+def selecionar_rank(selecao: SelecaoGeracao, rng: random.Random = random) -> Tuple[int, int]:
+    # Peso igual à posição na elite, com os pesos acumulados calculados uma vez por geração
+    if selecao._ranks_acumulados is None:
+        selecao._ranks_acumulados = list(itertools.accumulate(range(1, len(selecao._elite_lista) + 1)))
+    acumulados = selecao._ranks_acumulados
+    total_ranks = acumulados[-1]
+
+    pick1 = rng.uniform(0, total_ranks)
+    pick2 = rng.uniform(0, total_ranks)
+
+    pai1 = selecao._elite_lista[min(bisect.bisect_right(acumulados, pick1), len(acumulados) - 1)]
+    pai2 = selecao._elite_lista[min(bisect.bisect_right(acumulados, pick2), len(acumulados) - 1)]
+    return pai1, pai2
+
+
+def selecionar_elitismo(selecao: SelecaoGeracao, rng: random.Random = random) -> Tuple[int, int]:
+    return selecao._elite_lista[0], selecao._elite_lista[min(1, len(selecao._elite_lista) - 1)]
+
+
+def selecionar_truncamento(selecao: SelecaoGeracao, rng: random.Random = random) -> Tuple[int, int]:
+    porcentagem = 0.5
+    if selecao._truncados is None:
+        n_selecionados = max(int(len(selecao) * porcentagem), 1)
+        selecao._truncados = selecao.melhores(n_selecionados, ordenados=False).tolist()
+
+    pai1, pai2 = rng.choices(selecao._truncados, k=2)
+    return pai1, pai2
+
+
+# Mapeamento dos métodos de seleção de pais
+METODOS_SELECAO = {
+    1: selecionar_aleatorio,
+    2: selecionar_torneio,
+    3: selecionar_roleta,
+    4: selecionar_rank,
+    5: selecionar_elitismo,
+    6: selecionar_truncamento,
+}
@@ -0,0 +1,389 @@
+import argparse
+import os
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from avaliacao import CacheFitness
+from busca_local import BuscaLocal
+from checkpoint import carregar_checkpoint, salvar_checkpoint
+from distancias import CacheBlocos, OraculoCoordenadas, ProvedorDistancias
+from funcoes import (
+    calcular_matriz_distancias,
+    como_semente,
+    gerador_python,
+    gerar_populacao_lote,
+    mutate,
+    order_crossover,
+)
+from selecao import METODOS_SELECAO, SelecaoGeracao
+from substituicao import (
+    ESTRATEGIAS_SUBSTITUICAO,
+    EstrategiaSubstituicao,
+    SubstituicaoAleatoria,
+    SubstituicaoElitista,
+)
+from telemetria import Telemetria, agora, diversidade
+from tipos import Armazem, Individuo, Populacao
+from vizinhanca import IndiceVizinhos
+
+class EventoGeracao:
+    def __init__(
+        self,
+        geracao: int,
+        melhor_individuo: Individuo,
+        melhor_tempo: float,
+        selecao: SelecaoGeracao,
+        avaliacoes: int,
+        substituicao: EstrategiaSubstituicao,
+    ):
+        self.geracao = geracao
+        self.melhor_individuo = melhor_individuo
+        self.melhor_tempo = melhor_tempo
+        self.selecao = selecao # População da geração (buffer reaproveitado no passo seguinte), fitness em array NumPy e índices da elite
+        self.avaliacoes = avaliacoes # Fitness efetivamente calculados desde o início (sem contar acertos do cache)
+        self.substituicao = substituicao
+
+
+class AlgoritmoGenetico:
+    # Laço do GA sem pygame nem matplotlib: a visualização, se houver, é só mais um observador
+    def __init__(
+        self,
+        local_cidades,
+        capacidade_armazem_cidades: List[int],
+        dist_matrix: Union[np.ndarray, ProvedorDistancias],
+        tamanho_populacao: int = 500,
+        maximo_veiculos: int = 10,
+        capacidade_maxima: int = 50,
+        probabilidade_mutacao: float = 0.7,
+        metodos_selecao: Optional[Dict[int, Callable]] = None,
+        tamanho_cache_fitness: int = 100000,
+        processos: int = 1,
+        substituicao: Optional[EstrategiaSubstituicao] = None,
+        tamanho_elite: int = 10,
+        semente: Union[None, int, np.random.SeedSequence] = None,
+        busca_local: Optional[BuscaLocal] = None,
+        elite_busca_local: int = 5,
+        rotas_iniciais: Optional[List[List[int]]] = None,
+        telemetria: Optional[Telemetria] = None,
+    ):
+        self.local_cidades = local_cidades
+        self.capacidade_armazem_cidades = capacidade_armazem_cidades
+        self.dist_matrix = dist_matrix
+        self.tamanho_populacao = tamanho_populacao
+        self.maximo_veiculos = maximo_veiculos
+        self.capacidade_maxima = capacidade_maxima
+        self.probabilidade_mutacao = probabilidade_mutacao
+        self.metodos_selecao = metodos_selecao or METODOS_SELECAO
+        self.substituicao = substituicao or SubstituicaoAleatoria()
+        self.tamanho_elite = tamanho_elite # Melhores separados a cada geração para os métodos de seleção
+        # Dois geradores independentes da mesma semente: random.Random para seleção, cruzamento e
+        # mutação, e o Generator do NumPy para os indivíduos aleatórios, sorteados em lote
+        semente_random, semente_numpy = como_semente(semente).spawn(2)
+        self.random = gerador_python(semente_random)
+        self.rng = np.random.default_rng(semente_numpy)
+        self.busca_local = busca_local # Estágio memético opcional aplicado aos elite_busca_local melhores
+        self.elite_busca_local = elite_busca_local
+        self.rotas_iniciais = rotas_iniciais or [] # Rotas semeadas na primeira geração (ex.: vizinho mais próximo)
+        self.telemetria = telemetria # None desliga toda a instrumentação
+
+        self.avaliador = None
+        if processos > 1:
+            from paralelo import AvaliadorParalelo
+
+            self.avaliador = AvaliadorParalelo(capacidade_armazem_cidades, dist_matrix, processos)
+
+        self.cache_fitness = CacheFitness(capacidade_armazem_cidades, dist_matrix, tamanho_cache_fitness, self.avaliador)
+
+        self.populacao = None # Populacao da geração atual
+        self._reserva = None # Buffer da próxima geração; troca de lugar com a população a cada passo
+        self.geracao_atual = 0
+        self.melhor_individuo = None
+        self.melhor_tempo = None
+        self.interrompido = False
+        self._observadores = []
+
+    def observar(self, observador: Callable[[EventoGeracao], Optional[bool]], intervalo: int = 1):
+        # O observador recebe um EventoGeracao a cada `intervalo` gerações; se devolver False o GA para
+        self._observadores.append((observador, intervalo))
+
+    def fechar(self):
+        if self.avaliador is not None:
+            self.avaliador.fechar()
+
+    def nova_geracao(self, tamanho: Optional[int] = None) -> Populacao:
+        # Buffer onde a estratégia de substituição escreve a próxima geração, alocado uma vez e reaproveitado
+        tamanho = self.tamanho_populacao if tamanho is None else tamanho
+        rotas = self.populacao.rotas
+        if self._reserva is None or self._reserva.rotas.shape != (tamanho, rotas.shape[1]) or self._reserva.rotas.dtype != rotas.dtype:
+            self._reserva = Populacao(tamanho, rotas.shape[1], rotas.dtype)
+        return self._reserva
+
+    def gerar_aleatorios(self, quantidade: int, populacao: Optional[Populacao] = None, posicao: int = 0) -> Populacao:
+        # Com `populacao`, escreve nas linhas a partir de `posicao` em vez de alocar um buffer novo
+        if self.telemetria is not None:
+            inicio = agora()
+
+        populacao = gerar_populacao_lote(
+            self.local_cidades, self.maximo_veiculos, self.capacidade_maxima, quantidade, self.rng, populacao, posicao
+        )
+
+        if self.telemetria is not None:
+            self.telemetria.acumular("reposicao", inicio)
+            self.telemetria.contar("aleatorios", quantidade)
+        return populacao
+
+    def gerar_filho(self, selecao: SelecaoGeracao) -> Individuo:
+        if self.telemetria is not None:
+            return self._gerar_filho_medido(selecao)
+
+        metodo = self.random.randint(1, len(self.metodos_selecao)) # Sorteia um dos métodos de seleção de pais
+        pai1, pai2 = selecao.pais(self.metodos_selecao[metodo](selecao, self.random))
+
+        filho = order_crossover(pai1, pai2, self.random)
+        return mutate(filho, self.probabilidade_mutacao, self.random)
+
+    def _gerar_filho_medido(self, selecao: SelecaoGeracao) -> Individuo:
+        # Mesmo que gerar_filho, com o tempo de seleção, cruzamento e mutação separados na telemetria
+        telemetria = self.telemetria
+        inicio = agora()
+
+        metodo = self.random.randint(1, len(self.metodos_selecao))
+        pai1, pai2 = selecao.pais(self.metodos_selecao[metodo](selecao, self.random))
+        inicio = telemetria.acumular("selecao", inicio)
+
+        filho = order_crossover(pai1, pai2, self.random)
+        inicio = telemetria.acumular("cruzamento", inicio)
+
+        filho = mutate(filho, self.probabilidade_mutacao, self.random)
+        telemetria.acumular("mutacao", inicio)
+        telemetria.contar("filhos")
+        return filho
+
+    def _melhorar_elite(self, selecao: SelecaoGeracao, fitness_geracao: List[float]):
+        # 2-opt / Or-opt nas rotas da elite dentro do orçamento da geração; a rota nova só entra
+        # na população se o fitness de verdade (não só a distância) melhorar
+        self.busca_local.reiniciar_orcamento()
+
+        for indice in selecao.melhores(self.elite_busca_local).tolist():
+            if not self.busca_local.tem_orcamento():
+                break
+
+            individuo = self.populacao[indice]
+            rota, variacao = self.busca_local.melhorar(individuo.rota)
+            if variacao >= 0:
+                continue
+
+            melhorado = Individuo(individuo.veiculos, individuo.capacidade, rota)
+            fitness = self.cache_fitness.avaliar(melhorado)
+            if fitness < fitness_geracao[indice]:
+                self.populacao[indice] = melhorado
+                fitness_geracao[indice] = fitness
+
+    def passo(self) -> EventoGeracao:
+        telemetria = self.telemetria
+        if telemetria is not None:
+            inicio = inicio_passo = agora()
+            acertos, faltas = self.cache_fitness.acertos, self.cache_fitness.faltas
+
+        if self.populacao is None:
+            self.populacao = self.gerar_aleatorios(self.tamanho_populacao)
+            for individuo, rota in zip(self.populacao, self.rotas_iniciais):
+                individuo.rota = rota
+
+        fitness_geracao = self.cache_fitness.avaliar_populacao(self.populacao)
+        if telemetria is not None:
+            inicio = telemetria.acumular("avaliacao", inicio)
+
+        selecao = SelecaoGeracao(self.populacao, fitness_geracao, self.tamanho_elite)
+        if telemetria is not None:
+            inicio = telemetria.acumular("ordenacao", inicio)
+
+        if self.busca_local is not None:
+            self._melhorar_elite(selecao, fitness_geracao)
+            selecao = SelecaoGeracao(self.populacao, fitness_geracao, self.tamanho_elite)
+            if telemetria is not None:
+                inicio = telemetria.acumular("busca_local", inicio)
+        self.populacao.fitness[:] = fitness_geracao
+        # Cópia: a linha do melhor é sobrescrita quando este buffer voltar a ser a próxima geração
+        melhor_individuo = self.populacao.para_individuos([selecao.melhor])[0]
+        melhor_tempo = fitness_geracao[selecao.melhor]
+
+        self.geracao_atual += 1
+        self.melhor_individuo = melhor_individuo
+        self.melhor_tempo = melhor_tempo
+        evento = EventoGeracao(
+            self.geracao_atual,
+            melhor_individuo,
+            melhor_tempo,
+            selecao,
+            self.cache_fitness.faltas,
+            self.substituicao,
+        )
+
+        for observador, intervalo in self._observadores:
+            if self.geracao_atual % intervalo == 0 and observador(evento) is False:
+                self.interrompido = True
+
+        if telemetria is not None:
+            inicio = telemetria.acumular("observadores", inicio)
+            metricas = None
+            if telemetria.com_diversidade:
+                metricas = diversidade(self.populacao, selecao.fitness)
+                inicio = telemetria.acumular("diversidade", inicio)
+
+        nova_geracao = self.substituicao.proxima_geracao(self, selecao)
+        self._reserva, self.populacao = self.populacao, nova_geracao
+
+        if telemetria is not None:
+            # "substituicao" inclui seleção, cruzamento, mutação e reposição, que também saem separadas
+            fim = telemetria.acumular("substituicao", inicio)
+            telemetria.contar("avaliacoes", self.cache_fitness.faltas - faltas)
+            telemetria.contar("acertos_cache", self.cache_fitness.acertos - acertos)
+            telemetria.emitir(self.geracao_atual, metricas, tempo_ns=fim - inicio_passo, melhor_tempo=melhor_tempo)
+        return evento
+
+    def executar(self, total_geracoes: int, checkpoint: Optional[str] = None, intervalo_checkpoint: int = 50) -> Individuo:
+        # Com `checkpoint`, salva o estado a cada `intervalo_checkpoint` gerações (ver checkpoint.py)
+        for _ in range(total_geracoes):
+            self.passo()
+            if checkpoint is not None and self.geracao_atual % intervalo_checkpoint == 0:
+                salvar_checkpoint(self, checkpoint)
+            if self.interrompido:
+                break
+        return self.melhor_individuo
+
+
+NOMES_CIDADES = ["Tokyo", "New York", "Paris", "Berlim", "Roma", "Pequim", "Madrid", "Washington", "Brasilia", "Montevideo"]
+
+
+def instancia_padrao(semente: Union[int, np.random.SeedSequence]):
+    # Mesma instância de meucod.py, sem depender da tela
+    WIDTH, HEIGHT = 800, 600
+    PERCENTUAL_MARGEM_TELA = 0.07
+    margin_x = int(WIDTH * PERCENTUAL_MARGEM_TELA)
+    margin_y = int(HEIGHT * PERCENTUAL_MARGEM_TELA)
+
+    ESTOQUE_MINIMO_CIDADES = [7000, 4200, 3500, 2500, 5000, 6000, 3000, 2500, 1800, 4200]
+
+    rng = gerador_python(semente)
+    LOCAL_CIDADES = [(rng.randint(margin_x, WIDTH - margin_x), rng.randint(margin_y, HEIGHT - margin_y - 100)) for _ in range(len(NOMES_CIDADES))]
+    return LOCAL_CIDADES, ESTOQUE_MINIMO_CIDADES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distribuição de carga em armazéns - GA sem interface gráfica")
+    parser.add_argument("--geracoes", type=int, default=1000)
+    parser.add_argument("--populacao", type=int, default=500)
+    parser.add_argument("--veiculos", type=int, default=10, help="Quantidade máxima de veículos")
+    parser.add_argument("--capacidade", type=int, default=50, help="Capacidade máxima de cada veículo")
+    parser.add_argument("--mutacao", type=float, default=0.7)
+    parser.add_argument("--processos", type=int, default=1)
+    parser.add_argument("--substituicao", choices=sorted(ESTRATEGIAS_SUBSTITUICAO), default=SubstituicaoAleatoria.nome)
+    parser.add_argument("--filhos", type=int, default=None, help="Filhos por geração (estado_estacionario e mi_mais_lambda)")
+    parser.add_argument("--elite", type=int, default=10, help="Indivíduos mantidos pela estratégia elitista")
+    parser.add_argument("--imigrantes", type=float, default=0.1, help="Fração de aleatórios por geração na estratégia elitista")
+    parser.add_argument("--semente", type=int, default=34)
+    parser.add_argument("--busca-local", action="store_true", help="Aplica 2-opt / Or-opt à elite a cada geração")
+    parser.add_argument("--movimentos", type=int, default=1000, help="Movimentos da busca local por geração")
+    parser.add_argument("--tempo-busca", type=float, default=None, help="Segundos de busca local por geração")
+    parser.add_argument("--semear", type=int, default=0, help="Rotas de vizinho mais próximo na população inicial")
+    parser.add_argument(
+        "--distancias",
+        choices=["matriz", "oraculo", "blocos"],
+        default="matriz",
+        help="matriz N×N, oráculo sobre as coordenadas ou oráculo com cache de blocos",
+    )
+    parser.add_argument("--checkpoint", default=None, help="Arquivo .npz de checkpoint")
+    parser.add_argument("--intervalo-checkpoint", type=int, default=50, help="Gerações entre checkpoints")
+    parser.add_argument("--retomar", action="store_true", help="Continua a partir do --checkpoint, se ele existir")
+    parser.add_argument("--telemetria", default=None, help="Arquivo JSON lines com a telemetria de cada geração")
+    parser.add_argument("--intervalo", type=int, default=100, help="Imprime o progresso a cada N gerações (0 desliga)")
+    parser.add_argument("--gravar", default=None, help="Grava o mapa e o gráfico sem abrir janela: pasta (png) ou arquivo/FIFO (rgb)")
+    parser.add_argument("--formato-gravacao", choices=["png", "rgb"], default="png", help="Sequência de PNG ou quadros RGB24 crus")
+    parser.add_argument("--passo-gravacao", type=int, default=1, help="Grava um quadro a cada N gerações")
+    args = parser.parse_args()
+
+    # Uma semente para a instância e outra para o GA, as duas derivadas de --semente
+    semente_instancia, semente_ag = np.random.SeedSequence(args.semente).spawn(2)
+    LOCAL_CIDADES, ESTOQUE_MINIMO_CIDADES = instancia_padrao(semente_instancia)
+    if args.distancias == "oraculo":
+        dist_matrix = OraculoCoordenadas(LOCAL_CIDADES)
+    elif args.distancias == "blocos":
+        dist_matrix = CacheBlocos(OraculoCoordenadas(LOCAL_CIDADES))
+    else:
+        dist_matrix = calcular_matriz_distancias(LOCAL_CIDADES)
+
+    if args.substituicao == SubstituicaoElitista.nome:
+        substituicao = SubstituicaoElitista(args.elite, args.imigrantes)
+    elif args.filhos is not None and args.substituicao != SubstituicaoAleatoria.nome:
+        substituicao = ESTRATEGIAS_SUBSTITUICAO[args.substituicao](args.filhos)
+    else:
+        substituicao = ESTRATEGIAS_SUBSTITUICAO[args.substituicao]()
+
+    indice_vizinhos = IndiceVizinhos(LOCAL_CIDADES) if args.busca_local or args.semear else None
+
+    busca_local = None
+    if args.busca_local:
+        busca_local = BuscaLocal(
+            dist_matrix, indice_vizinhos.vizinhos, maximo_movimentos=args.movimentos, tempo_limite=args.tempo_busca
+        )
+
+    rotas_iniciais = []
+    for inicio in range(min(args.semear, len(LOCAL_CIDADES))):
+        rotas_iniciais.append(indice_vizinhos.rota_vizinho_mais_proximo(inicio))
+
+    ag = AlgoritmoGenetico(
+        LOCAL_CIDADES,
+        ESTOQUE_MINIMO_CIDADES,
+        dist_matrix,
+        tamanho_populacao=args.populacao,
+        maximo_veiculos=args.veiculos,
+        capacidade_maxima=args.capacidade,
+        probabilidade_mutacao=args.mutacao,
+        processos=args.processos,
+        substituicao=substituicao,
+        semente=semente_ag,
+        busca_local=busca_local,
+        rotas_iniciais=rotas_iniciais,
+        telemetria=Telemetria(args.telemetria) if args.telemetria is not None else None,
+    )
+
+    if args.intervalo > 0:
+        ag.observar(
+            lambda evento: print(f"Geração: {evento.geracao} Melhor tempo: {evento.melhor_tempo} Avaliações: {evento.avaliacoes}"),
+            args.intervalo,
+        )
+
+    gravador = None
+    if args.gravar is not None:
+        from visualizacao import GravadorQuadros
+
+        armazens = [Armazem(local, nome, estoque) for local, nome, estoque in zip(LOCAL_CIDADES, NOMES_CIDADES, ESTOQUE_MINIMO_CIDADES)]
+        gravador = GravadorQuadros(
+            armazens, args.gravar, args.formato_gravacao, passo=args.passo_gravacao, total_geracoes=args.geracoes
+        )
+        ag.observar(gravador.observador)
+
+    if args.retomar and args.checkpoint is not None and os.path.exists(args.checkpoint):
+        carregar_checkpoint(ag, args.checkpoint)
+        print(f"Retomando da geração {ag.geracao_atual} (melhor tempo: {ag.melhor_tempo})")
+
+    try:
+        melhor_individuo = ag.executar(args.geracoes - ag.geracao_atual, args.checkpoint, args.intervalo_checkpoint)
+    finally:
+        ag.fechar()
+        if ag.telemetria is not None:
+            ag.telemetria.fechar()
+        if gravador is not None:
+            gravador.fechar()
+
+    print(f"Melhor indivíduo: {melhor_individuo} Melhor tempo: {ag.melhor_tempo} Rota: {np.asarray(melhor_individuo.rota).tolist()}")
+    print(f"Substituição: {ag.substituicao} Cache de fitness: {ag.cache_fitness}")
+    if gravador is not None:
+        largura, altura = gravador.tamanho_quadro
+        print(f"Quadros gravados: {gravador.gravados} ({largura}x{altura}) em {args.gravar}")
+
+
+if __name__ == "__main__":
+    main()
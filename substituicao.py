@@ -0,0 +1,120 @@
+import numpy as np
+
+from tipos import Populacao
+
+# Estratégias de substituição: como a população de uma geração vira a da próxima.
+# Todas recebem o AlgoritmoGenetico (para cruzar, mutar, avaliar e gerar aleatórios)
+# e a SelecaoGeracao da geração atual (população, fitness e elite), e escrevem a próxima
+# geração nas linhas do buffer devolvido por ag.nova_geracao().
+
+
+class EstrategiaSubstituicao:
+    nome = ""
+
+    def __repr__(self):
+        return self.nome
+
+    def proxima_geracao(self, ag, selecao) -> Populacao:
+        raise NotImplementedError
+
+
+class SubstituicaoAleatoria(EstrategiaSubstituicao):
+    # Comportamento original: o melhor indivíduo, filhos até `percentual_filhos` da população e o resto aleatório
+    nome = "aleatoria"
+
+    def __init__(self, percentual_filhos: float = 0.1):
+        self.percentual_filhos = percentual_filhos
+
+    def __repr__(self):
+        return f"{self.nome} (filhos: {self.percentual_filhos:.0%})"
+
+    def proxima_geracao(self, ag, selecao) -> Populacao:
+        nova_geracao = ag.nova_geracao()
+        nova_geracao.copiar(selecao.populacao, [selecao.melhor]) # Elitismo - nova geração começa com o melhor indivíduo
+
+        posicao = 1
+        while posicao < (ag.tamanho_populacao * self.percentual_filhos):
+            nova_geracao[posicao] = ag.gerar_filho(selecao)
+            posicao += 1
+
+        # Preenche o restante da nova geração com indivíduos aleatórios
+        return ag.gerar_aleatorios(ag.tamanho_populacao - posicao, nova_geracao, posicao)
+
+
+class SubstituicaoEstadoEstacionario(EstrategiaSubstituicao):
+    # Só `filhos` indivíduos novos por geração, que tomam o lugar dos piores
+    nome = "estado_estacionario"
+
+    def __init__(self, filhos: int = 2):
+        self.filhos = filhos
+
+    def __repr__(self):
+        return f"{self.nome} (filhos: {self.filhos})"
+
+    def proxima_geracao(self, ag, selecao) -> Populacao:
+        nova_geracao = ag.nova_geracao(len(selecao))
+        sobreviventes = selecao.melhores(len(selecao) - min(self.filhos, len(selecao)), ordenados=False)
+        nova_geracao.copiar(selecao.populacao, sobreviventes)
+
+        for posicao in range(len(sobreviventes), len(selecao)):
+            nova_geracao[posicao] = ag.gerar_filho(selecao)
+        return nova_geracao
+
+
+class SubstituicaoMiMaisLambda(EstrategiaSubstituicao):
+    # (μ+λ): gera `filhos` (λ) filhos e fica com os μ melhores entre pais e filhos
+    nome = "mi_mais_lambda"
+
+    def __init__(self, filhos: int = 50):
+        self.filhos = filhos
+
+    def __repr__(self):
+        return f"{self.nome} (λ: {self.filhos})"
+
+    def proxima_geracao(self, ag, selecao) -> Populacao:
+        filhos = [ag.gerar_filho(selecao) for _ in range(self.filhos)]
+        fitness = np.concatenate((selecao.fitness, ag.cache_fitness.avaliar_populacao(filhos)))
+
+        melhores = np.argpartition(fitness, ag.tamanho_populacao - 1)[: ag.tamanho_populacao] if len(fitness) > ag.tamanho_populacao else np.arange(len(fitness))
+        nova_geracao = ag.nova_geracao(len(melhores))
+
+        # Pais sobreviventes em bloco; os filhos escolhidos entram um a um nas posições que sobraram
+        pais = melhores < len(selecao)
+        nova_geracao.copiar(selecao.populacao, melhores[pais], np.flatnonzero(pais))
+        for posicao in np.flatnonzero(~pais).tolist():
+            nova_geracao[posicao] = filhos[melhores[posicao] - len(selecao)]
+        nova_geracao.fitness[:] = fitness[melhores]
+        return nova_geracao
+
+
+class SubstituicaoElitista(EstrategiaSubstituicao):
+    # Mantém os `elite` melhores, completa com filhos e reserva `taxa_imigrantes` da população para aleatórios
+    nome = "elitista"
+
+    def __init__(self, elite: int = 10, taxa_imigrantes: float = 0.1):
+        self.elite = elite
+        self.taxa_imigrantes = taxa_imigrantes
+
+    def __repr__(self):
+        return f"{self.nome} (elite: {self.elite}, imigrantes: {self.taxa_imigrantes:.0%})"
+
+    def proxima_geracao(self, ag, selecao) -> Populacao:
+        nova_geracao = ag.nova_geracao()
+        elite = selecao.melhores(self.elite)
+        nova_geracao.copiar(selecao.populacao, elite)
+
+        imigrantes = int(ag.tamanho_populacao * self.taxa_imigrantes)
+        posicao = len(elite)
+        while posicao < ag.tamanho_populacao - imigrantes:
+            nova_geracao[posicao] = ag.gerar_filho(selecao)
+            posicao += 1
+
+        return ag.gerar_aleatorios(ag.tamanho_populacao - posicao, nova_geracao, posicao)
+
+
+ESTRATEGIAS_SUBSTITUICAO = {
+    SubstituicaoAleatoria.nome: SubstituicaoAleatoria,
+    SubstituicaoEstadoEstacionario.nome: SubstituicaoEstadoEstacionario,
+    SubstituicaoMiMaisLambda.nome: SubstituicaoMiMaisLambda,
+    SubstituicaoElitista.nome: SubstituicaoElitista,
+}
@@ -0,0 +1,109 @@
+import json
+import time
+from typing import Callable, Dict, Optional, Union
+
+import numpy as np
+
+# Telemetria por geração: tempo de cada fase em nanossegundos, contadores e métricas de
+# diversidade da população, emitidos como uma linha JSON por geração para um arquivo, um objeto
+# com write() ou uma função. Quem instrumenta guarda a Telemetria num atributo que fica None
+# quando ela está desligada, então o custo sem telemetria é só esse teste.
+
+agora = time.perf_counter_ns
+
+
+def _nao_medir(fase: str, inicio: int) -> int:
+    return 0
+
+
+def marcador(telemetria: Optional["Telemetria"]) -> Callable[[str, int], int]:
+    # Telemetria.acumular, ou uma função que não faz nada quando a telemetria está desligada.
+    # Para laços por geração; nos laços por indivíduo prefira testar `telemetria is not None`.
+    return telemetria.acumular if telemetria is not None else _nao_medir
+
+
+def diversidade(populacao, fitness) -> Dict[str, float]:
+    # Métricas da população da geração: fitness, genótipos e rotas distintos e a distância média
+    # de Hamming (fração de posições diferentes) de cada rota até a rota do melhor indivíduo
+    fitness = np.asarray(fitness, dtype=np.float64)
+    if not len(fitness):
+        return {}
+
+    if hasattr(populacao, "rotas"): # Populacao: os arrays já estão prontos
+        rotas = populacao.rotas.astype(np.int32)
+        veiculos, capacidade = populacao.veiculos, populacao.capacidade
+    else:
+        rotas = np.array([individuo.rota for individuo in populacao], dtype=np.int32)
+        veiculos = np.array([individuo.veiculos for individuo in populacao], dtype=np.int32)
+        capacidade = np.array([individuo.capacidade for individuo in populacao], dtype=np.int32)
+    genotipos = np.column_stack((veiculos, capacidade, rotas))
+    melhor = int(np.argmin(fitness))
+
+    return {
+        "fitness_melhor": float(fitness[melhor]),
+        "fitness_media": float(fitness.mean()),
+        "fitness_desvio": float(fitness.std()),
+        "genotipos_unicos": int(len(np.unique(genotipos, axis=0))),
+        "rotas_unicas": int(len(np.unique(rotas, axis=0))),
+        "distancia_melhor": float((rotas != rotas[melhor]).mean()) if rotas.size else 0.0,
+    }
+
+
+class Telemetria:
+    def __init__(self, destino: Union[str, Callable[[dict], None], object], com_diversidade: bool = True):
+        # destino: caminho de arquivo (JSON lines), objeto com write() ou função que recebe o dicionário.
+        # com_diversidade=False pula as métricas de diversidade, que custam O(P · N log P) por geração.
+        self.com_diversidade = com_diversidade
+        self._arquivo = None
+        self._funcao = None
+        if isinstance(destino, str):
+            self._arquivo = open(destino, "a", encoding="utf-8")
+            self._proprio = True
+        elif hasattr(destino, "write"):
+            self._arquivo = destino
+            self._proprio = False
+        else:
+            self._funcao = destino
+            self._proprio = False
+
+        self.fases: Dict[str, int] = {}
+        self.contadores: Dict[str, int] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def fechar(self):
+        if self._arquivo is not None and self._proprio:
+            self._arquivo.close()
+        self._arquivo = None
+
+    def acumular(self, fase: str, inicio: int) -> int:
+        # Soma o tempo desde `inicio` à fase e devolve o instante atual, para encadear fases seguidas
+        fim = agora()
+        self.fases[fase] = self.fases.get(fase, 0) + fim - inicio
+        return fim
+
+    def contar(self, contador: str, quantidade: int = 1):
+        self.contadores[contador] = self.contadores.get(contador, 0) + quantidade
+
+    def emitir(self, geracao: int, diversidade: Optional[Dict[str, float]] = None, **extras):
+        registro = {
+            "geracao": geracao,
+            "fases_ns": self.fases,
+            "contadores": self.contadores,
+        }
+        if diversidade is not None:
+            registro["diversidade"] = diversidade
+        registro.update(extras)
+
+        if self._funcao is not None:
+            self._funcao(registro)
+        elif self._arquivo is not None:
+            self._arquivo.write(json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._arquivo.flush()
+
+        self.fases = {}
+        self.contadores = {}
@@ -1,208 +1,53 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
-import pygame
 import random
-from pygame.locals import *
 import itertools
-import matplotlib.pyplot as plt
-import matplotlib.backends.backend_agg as agg
+from tipos import Armazem, Individuo
+from avaliacao import avaliar_populacao
+from funcoes import calcular_matriz_distancias, gerador_python, init_screen, order_crossover
+from telemetria import Telemetria, agora, diversidade, marcador
+from visualizacao import GraficoConvergencia, RenderizadorRotas, Visualizador
 
-class Armazem:
-    def __init__(self, localizacao: Tuple[int, int], nome_cidade: str, estoque_minimo: int):
-        self.localizacao = localizacao
-        self.nome_cidade = nome_cidade
-        self.estoque_minimo = estoque_minimo
-
-class Individuo:
-    def __init__(self, veiculos: int, capacidade: int, rota: List[int]):
-        self.veiculos = veiculos
-        self.capacidade = capacidade
-        self.rota = rota
-
-    def __repr__(self):
-        return f"Veículos: {self.veiculos}, Cap. Un.: {self.capacidade}, Cap. Total.: {self.veiculos * self.capacidade}"
-    
-    def calcular_fitness(self, capacidade_armazem_cidades: List[int], dist_matrix: List[List[float]]) -> float:
-        capacidade_veiculo = self.capacidade
-        rota = self.rota
-        quantidade_veiculos = self.veiculos
-        
-        itens_por_armazem = [0] * len(capacidade_armazem_cidades) # Inicializa a quantidade de itens em cada armazém
-
-        velocidade = 120 - capacidade_veiculo # A velocidade do veículo diminui conforme a capacidade aumenta
-
-        tempo_total = 0
-
-        while True:
-
-            rota_a_percorrer = []
-
-            for i in range(len(rota)):
-                armazem = rota[i]
-
-                if itens_por_armazem[armazem] < capacidade_armazem_cidades[armazem]:
-                    rota_a_percorrer.append(armazem)
-
-            if not rota_a_percorrer:
-                break
-
-            for i in range(len(rota_a_percorrer)):
-                armazem = rota_a_percorrer[i]
-
-                itens_por_armazem[armazem] += capacidade_veiculo * quantidade_veiculos
-
-                if i == len(rota_a_percorrer) - 1:
-                    distancia = 0
-                else:
-                    distancia = dist_matrix[rota_a_percorrer[i]][rota_a_percorrer[i+1]]
-
-                tempo = round(distancia / velocidade, 2)
-
-                tempo_total += tempo * quantidade_veiculos
-
-        return round(tempo_total, 2)
-
-def calcular_matriz_distancias(
-    local_cidades: List[Tuple[int, int]]
-) -> List[List[float]]:
-    dist_matrix = np.zeros((len(local_cidades), len(local_cidades)))
-
-    for i in range(len(local_cidades)):
-        for j in range(len(local_cidades)):
-            x1, y1 = local_cidades[i]
-            x2, y2 = local_cidades[j]
-            distance = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-            dist_matrix[i][j] = distance
-
-    return dist_matrix
 
 def gerar_populacao(
     local_cidades: List[Tuple[int, int]],
     maximo_veiculos: int,
     capacidade_maxima: int,
     tamanho_populacao: int,
+    rng: random.Random = random,
 ) -> List[Individuo]:
     populacao = []
     for _ in range(tamanho_populacao):
-        veiculo = random.randint(1, maximo_veiculos)
-        capacidade = random.randint(1, capacidade_maxima)
+        veiculo = rng.randint(1, maximo_veiculos)
+        capacidade = rng.randint(1, capacidade_maxima)
 
-        rota = random.sample(range(len(local_cidades)), len(local_cidades))
+        rota = rng.sample(range(len(local_cidades)), len(local_cidades))
         individuo = Individuo(veiculo, capacidade, rota)
 
         populacao.append(individuo)
     return populacao
 
-def order_crossover(pai1: Individuo, pai2: Individuo) -> Individuo:
-    tamanho = len(pai1.rota)
-    start_index = random.randint(0, tamanho - 1)
-    end_index = random.randint(start_index + 1, tamanho)
-    filho = Individuo(pai1.veiculos, pai1.capacidade, [])
-    filho.rota.extend(pai1.rota[start_index:end_index])
-    remaining_positions = [
-        i for i in range(tamanho) if i < start_index or i >= end_index
-    ]
-    remaining_genes = [gene for gene in pai2.rota if gene not in filho.rota]
-    for position, gene in zip(remaining_positions, remaining_genes):
-        filho.rota.insert(position, gene)
-    return filho
-
-def mutate(solution: Individuo, mutation_probability: float) -> Individuo:
-    if random.random() < mutation_probability:
-        index1 = random.randint(0, len(solution.rota) - 1)
-        index2 = random.randint(0, len(solution.rota) - 1)
+def mutate(solution: Individuo, mutation_probability: float, rng: random.Random = random) -> Individuo:
+    if rng.random() < mutation_probability:
+        index1 = rng.randint(0, len(solution.rota) - 1)
+        index2 = rng.randint(0, len(solution.rota) - 1)
         solution.rota[index1], solution.rota[index2] = (
             solution.rota[index2],
             solution.rota[index1],
         )
     return solution
 
-def init_screen(width: int, height: int, caption: str) -> pygame.Surface:
-    pygame.init()
-    screen = pygame.display.set_mode((width, height))
-    pygame.display.set_caption(caption)
-    return screen
-
-def desenhar_rotas(screen, melhor_rota, armazens):
-    WHITE = (255, 255, 255)
-    BLACK = (0, 0, 0)
-    RED = (255, 0, 0)
-    BLUE = (0, 0, 255)
-    screen.fill(WHITE)
-    font = pygame.font.Font(None, 20)
-    for armazem in armazens:
-        x, y = armazem.localizacao
-        pygame.draw.circle(screen, BLUE, (x, y), 5)
-        text = font.render(armazem.nome_cidade, True, WHITE)
-        text_rect = text.get_rect(center=(x - 15, y - 15))
-        screen.blit(text, text_rect)
-    for i in range(len(melhor_rota)):
-        cidade_atual = melhor_rota[i]
-        proxima_cidade = melhor_rota[(i + 1) % len(melhor_rota)]
-        pygame.draw.line(
-            screen,
-            RED,
-            armazens[cidade_atual].localizacao,
-            armazens[proxima_cidade].localizacao,
-            2,
-        )
-        text = font.render(f"({i + 1})", True, WHITE)
-        x, y = armazens[cidade_atual].localizacao
-        text_rect = text.get_rect(center=(x - 20, y - 30))
-        screen.blit(text, text_rect)
-    pygame.display.flip()
-
-def desenhar_info(screen, geracao, melhor_tempo, melhor_individuo):
-    font = pygame.font.Font(None, 20)
-    GREEN = (0, 255, 0)
-    text = font.render(f"Geração: {geracao}", True, GREEN)   
-    screen.blit(text, (10, 500))
-    if melhor_individuo:
-        text = font.render(f"Melhor indivíduo: {melhor_individuo}", True, GREEN)
-        screen.blit(text, (10, 520))
-        text = font.render(f"Melhor tempo: {melhor_tempo}", True, GREEN)
-        screen.blit(text, (10, 540))
-        pygame.display.flip()
-
-def plotar_graficos(geracoes, custos):
-    plt.figure(figsize=(12, 6))
-
-    plt.subplot(1, 2, 1)
-    plt.plot(geracoes, custos, label='Custo Total')
-    plt.xlabel('Geração')
-    plt.ylabel('Custo')
-    plt.title('Evolução do Custo ao Longo das Gerações')
-    plt.legend()
-    plt.grid(True)
-
-
-    plt.tight_layout()
-
-
-def renderizar_grafico(screen, fig, posicao, width, height):
-    canvas = agg.FigureCanvasAgg(fig)
-    canvas.draw()
-    renderer = canvas.get_renderer()
-    raw_data = renderer.tostring_rgb()
-    size = canvas.get_width_height()
-
-    surf = pygame.image.fromstring(raw_data, size, "RGB")
-    surf = pygame.transform.scale(surf, (width, height))
-    screen.blit(surf, posicao)
-    pygame.display.flip()
-
-
-def metodo_selecao_aleatorio(populacao_fitness):
-    pai1_fitness, pai2_fitness = random.choices(populacao_fitness[:10], k=2)
+def metodo_selecao_aleatorio(populacao_fitness, rng=random):
+    pai1_fitness, pai2_fitness = rng.choices(populacao_fitness[:10], k=2)
     pai1 = pai1_fitness[0]
     pai2 = pai2_fitness[0]
     return pai1, pai2
 
-def metodo_selecao_torneio(populacao_fitness):
+def metodo_selecao_torneio(populacao_fitness, rng=random):
     def torneio(populacao_fitness):
         tamanho_torneio = 3
-        participantes = random.sample(populacao_fitness, tamanho_torneio)
+        participantes = rng.sample(populacao_fitness, tamanho_torneio)
         participantes.sort(key=lambda x: x[1])
         return participantes[0]
     
@@ -218,6 +63,9 @@ def algoritmo_genetico(
     capacidade_armazem_cidades: List[int],
     dist_matrix: List[List[float]],
     metodo_de_selecao,
+    rng: random.Random = random,
+    telemetria: Optional[Telemetria] = None,
+    visualizador: Optional[Visualizador] = None,
 ) -> Individuo:
     maximo_veiculos = 4
     populacao = gerar_populacao(
@@ -225,46 +73,53 @@ def algoritmo_genetico(
         maximo_veiculos,
         capacidade_maxima,
         tamanho_populacao,
+        rng,
     )
     melhor_individuo = None
     melhor_tempo = float("inf")
     melhor_individuos_por_geracao = []
     tempos_por_geracao = []
     lista_geracoes = []
+    medir = marcador(telemetria)
     for geracao in range(geracoes):
+        if visualizador is not None and visualizador.parado:
+            break
+        inicio = inicio_geracao = agora() if telemetria is not None else 0
         lista_geracoes.append(geracao)
-        populacao_fitness = [
-            (individuo, individuo.calcular_fitness(capacidade_armazem_cidades, dist_matrix))
-            for individuo in populacao
-        ]
+        fitness_populacao = avaliar_populacao(populacao, capacidade_armazem_cidades, dist_matrix)
+        inicio = medir("avaliacao", inicio)
+        metricas = diversidade(populacao, fitness_populacao) if telemetria is not None and telemetria.com_diversidade else None
+        inicio = medir("diversidade", inicio)
+        populacao_fitness = list(zip(populacao, fitness_populacao))
         populacao_fitness.sort(key=lambda x: x[1])
+        inicio = medir("ordenacao", inicio)
         if populacao_fitness[0][1] < melhor_tempo:
             melhor_tempo = populacao_fitness[0][1]
             melhor_individuo = populacao_fitness[0][0]
-        nova_populacao = populacao_fitness[:2]
+        # Os filhos são avaliados em lote no início da próxima geração
+        nova_populacao = [individuo for individuo, _ in populacao_fitness[:2]]
         while len(nova_populacao) < tamanho_populacao:
-            pai1, pai2 = metodo_de_selecao(populacao_fitness)
-            filho = order_crossover(pai1, pai2)
-            filho_mutado = mutate(filho, 0.1)
-            nova_populacao.append((filho_mutado, filho_mutado.calcular_fitness(capacidade_armazem_cidades, dist_matrix)))
-        populacao = [individuo for individuo, _ in nova_populacao]
+            pai1, pai2 = metodo_de_selecao(populacao_fitness, rng)
+            filho = order_crossover(pai1, pai2, rng)
+            filho_mutado = mutate(filho, 0.1, rng)
+            nova_populacao.append(filho_mutado)
+        populacao = nova_populacao
         melhor_individuos_por_geracao.append(melhor_individuo)
         tempos_por_geracao.append(melhor_tempo)
+        inicio = medir("reproducao", inicio) # Seleção, cruzamento e mutação dos filhos
         
-        screen = init_screen(800, 800, "Algoritmo Genético - Otimização de Rotas")
-        WIDTH, HEIGHT = 800, 800
-        PERCENTUAL_MARGEM_TELA = 0.07  # 7% de margem
-        margin_x = int(WIDTH * PERCENTUAL_MARGEM_TELA)
-        margin_y = int(HEIGHT * PERCENTUAL_MARGEM_TELA)
-        
-        desenhar_rotas(screen, melhor_individuo.rota, armazens)
-        plotar_graficos(range(1, len(lista_geracoes) + 1), tempos_por_geracao)
-        renderizar_grafico(screen, plt.gcf(), (margin_x, HEIGHT // 2 + margin_y), WIDTH - 2 * margin_x, HEIGHT // 2 - 2 * margin_y)
-
-        desenhar_info(screen, geracao, melhor_tempo, melhor_individuo)
+        # O desenho fica com o laço do Visualizador; aqui só sai um instantâneo quando o melhor melhora
+        if visualizador is not None:
+            visualizador.publicar(geracao, melhor_individuo, melhor_tempo)
+        if telemetria is not None:
+            fim = telemetria.acumular("visualizacao", inicio)
+            telemetria.contar("avaliacoes", len(fitness_populacao))
+            telemetria.emitir(geracao, metricas, tempo_ns=fim - inicio_geracao, melhor_tempo=melhor_tempo)
     return melhor_individuo
 
 def main():
+    import pygame
+
     armazens=[]
     WIDTH, HEIGHT = 800, 800
     TAMANHO_POPULACAO = 500
@@ -272,13 +127,18 @@ def main():
     CAPACIDADE_MAXIMA = 50
     MAXIMO_VEICULOS = 10
     PROBABILIDADE_MUTACAO = 0.7
+    ARQUIVO_TELEMETRIA = None  # Ex.: "telemetria.jsonl" para gravar o tempo de cada fase por geração
 
     PERCENTUAL_MARGEM_TELA = 0.07  # 7% de margem
     margin_x = int(WIDTH * PERCENTUAL_MARGEM_TELA)
     margin_y = int(HEIGHT * PERCENTUAL_MARGEM_TELA)
     
+    SEMENTE = 34
+    semente_cidades, semente_ag = np.random.SeedSequence(SEMENTE).spawn(2)
+    rng_cidades = gerador_python(semente_cidades)
+
     NOMES_CIDADES = ["Tokyo", "New York", "Paris", "Berlim", "Roma", "Pequim", "Madrid", "Washington", "Brasilia", "Montevideo"]
-    LOCAL_CIDADES = [(random.randint(margin_x, WIDTH - margin_x), random.randint(margin_y, HEIGHT - margin_y - 100)) for _ in range(len(NOMES_CIDADES))]
+    LOCAL_CIDADES = [(rng_cidades.randint(margin_x, WIDTH - margin_x), rng_cidades.randint(margin_y, HEIGHT - margin_y - 100)) for _ in range(len(NOMES_CIDADES))]
     ESTOQUE_MINIMO_CIDADES = [7000, 4200, 3500, 2500, 5000, 6000, 3000, 2500, 1800, 4200]
         
     
@@ -293,14 +153,45 @@ def main():
     capacidade_armazem_cidades = [armazem.estoque_minimo for armazem in armazens]
     local_cidades = [armazem.localizacao for armazem in armazens]
     dist_matrix = calcular_matriz_distancias(local_cidades)
-    melhor_individuo = algoritmo_genetico(
-        armazens, 20, 100, capacidade_maxima, capacidade_armazem_cidades, dist_matrix, metodo_selecao_aleatorio
-    )
+    telemetria = Telemetria(ARQUIVO_TELEMETRIA) if ARQUIVO_TELEMETRIA else None
+
+    # Tela, fundo do mapa e figura do gráfico criados uma vez; o GA roda numa thread e a tela só é
+    # redesenhada quando chega um melhor novo
+    screen = init_screen(WIDTH, HEIGHT, "Algoritmo Genético - Otimização de Rotas")
+    renderizador = RenderizadorRotas(screen, armazens, cor_fundo=(255, 255, 255))
+    grafico = GraficoConvergencia(WIDTH - 2 * margin_x, HEIGHT // 2 - 2 * margin_y, TOTAL_GERACOES)
+    visualizador = Visualizador()
+
+    def desenhar(quadro):
+        renderizador.desenhar_rotas(quadro.melhor_individuo.rota)
+        # Histórico gravado pelo GA: inclui as melhoras dos quadros descartados pelo Visualizador
+        for geracao, melhor_tempo in visualizador.historico[len(grafico) : quadro.tamanho_historico]:
+            grafico.adicionar(geracao + 1, melhor_tempo)
+        screen.blit(grafico.renderizar(), (margin_x, HEIGHT // 2 + margin_y))
+        renderizador.desenhar_info(quadro.geracao, quadro.melhor_tempo, quadro.melhor_individuo)
+        renderizador.apresentar()
+
+    try:
+        melhor_individuo = visualizador.executar(
+            lambda: algoritmo_genetico(
+                armazens, 20, TOTAL_GERACOES, capacidade_maxima, capacidade_armazem_cidades, dist_matrix,
+                metodo_selecao_aleatorio, gerador_python(semente_ag), telemetria, visualizador,
+            ),
+            desenhar,
+        )
+    finally:
+        if telemetria is not None:
+            telemetria.fechar()
+
+    if visualizador.parado: # Janela fechada durante a execução
+        pygame.quit()
+        return
+
     print("Melhor indivíduo encontrado:", melhor_individuo)
     running = True
     while running:
         for event in pygame.event.get():
-            if event.type == QUIT:
+            if event.type == pygame.QUIT:
                 running = False
         pygame.display.flip()
     pygame.quit()
@@ -1,4 +1,8 @@
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from distancias import ProvedorDistancias
 
 
 class Armazem:
@@ -9,6 +13,8 @@ class Armazem:
 
 
 class Individuo:
+    __slots__ = ("veiculos", "capacidade", "rota")
+
     def __init__(self, veiculos: int, capacidade: int, rota: List[int]):
         self.veiculos = veiculos
         self.capacidade = capacidade
@@ -17,44 +23,163 @@ class Individuo:
     def __repr__(self):
         return f"Veículos: {self.veiculos}, Cap. Un.: {self.capacidade}, Cap. Total.: {self.veiculos * self.capacidade}"
     
-    def calcular_fitness(self, capacidade_armazem_cidades: List[int], dist_matrix: List[List[float]]) -> float:
+    def calcular_fitness(
+        self, capacidade_armazem_cidades: List[int], dist_matrix: Union[List[List[float]], np.ndarray, ProvedorDistancias]
+    ) -> float:
         capacidade_veiculo = self.capacidade
-        rota = self.rota
         quantidade_veiculos = self.veiculos
-        
-        itens_por_armazem = [0] * len(capacidade_armazem_cidades) # Inicializa a quantidade de itens em cada armazém
-
-        velocidade = 120 - capacidade_veiculo # A velocidade do veículo diminui conforme a capacidade aumenta
-
-        tempo_total = 0
-
-        while True:
-
-            rota_a_percorrer = []
 
-            for i in range(len(rota)):
-                armazem = rota[i]
+        entrega_por_passada = capacidade_veiculo * quantidade_veiculos # Itens entregues em cada armazém a cada passada pela rota
 
-                if itens_por_armazem[armazem] < capacidade_armazem_cidades[armazem]:
-                    rota_a_percorrer.append(armazem)
-
-            if not rota_a_percorrer:
-                break
-
-            #print (f"Armazéns: {itens_por_armazem} - Rota: {rota_a_percorrer} - Veículos: {quantidade_veiculos} - Capacidade: {capacidade_veiculo}")
-
-            for i in range(len(rota_a_percorrer)):
-                armazem = rota_a_percorrer[i]
-
-                itens_por_armazem[armazem] += capacidade_veiculo * quantidade_veiculos
-
-                if i == len(rota_a_percorrer) - 1:
-                    distancia = 0
-                else:
-                    distancia = dist_matrix[rota_a_percorrer[i]][rota_a_percorrer[i+1]]
+        velocidade = 120 - capacidade_veiculo # A velocidade do veículo diminui conforme a capacidade aumenta
 
-                tempo = round(distancia / velocidade, 2)
+        # Quantidade de passadas que cada armazém precisa até atingir o estoque mínimo (arredondada para cima).
+        # Armazéns sem estoque mínimo nunca entram na rota a percorrer.
+        rota = []
+        passadas = []
+        for armazem in self.rota:
+            estoque = capacidade_armazem_cidades[armazem]
+            if estoque > 0:
+                rota.append(armazem)
+                passadas.append(-(-estoque // entrega_por_passada))
+
+        if not rota:
+            return 0.0
+
+        # Tempo de cada trecho em centésimos, com o mesmo arredondamento da simulação passada a passada
+        def tempo_trecho(origem, destino):
+            return int(round(round(dist_matrix[origem][destino] / velocidade, 2) * 100))
+
+        # Lista duplamente encadeada sobre as posições da rota: a cada nível de passadas os armazéns
+        # já abastecidos saem da rota a percorrer e o trecho anterior é religado ao próximo
+        tamanho = len(rota)
+        anterior = list(range(-1, tamanho - 1))
+        proximo = list(range(1, tamanho + 1))
+
+        tempo_passada = 0 # Tempo de uma passada pela rota a percorrer atual
+        for i in range(tamanho - 1):
+            tempo_passada += tempo_trecho(rota[i], rota[i + 1])
 
-                tempo_total += tempo * quantidade_veiculos
+        tempo_total = 0
+        passadas_feitas = 0
+
+        for posicao in sorted(range(tamanho), key=passadas.__getitem__):
+            tempo_total += (passadas[posicao] - passadas_feitas) * tempo_passada
+            passadas_feitas = passadas[posicao]
+
+            # Remove o armazém abastecido da rota a percorrer
+            antes, depois = anterior[posicao], proximo[posicao]
+            if antes >= 0:
+                tempo_passada -= tempo_trecho(rota[antes], rota[posicao])
+                proximo[antes] = depois
+            if depois < tamanho:
+                tempo_passada -= tempo_trecho(rota[posicao], rota[depois])
+                anterior[depois] = antes
+            if antes >= 0 and depois < tamanho:
+                tempo_passada += tempo_trecho(rota[antes], rota[depois])
+
+        return round(tempo_total * quantidade_veiculos / 100, 2)
+
+
+class IndividuoLinha(Individuo):
+    # Visão de uma linha da Populacao com a mesma interface de Individuo; a rota é uma view do buffer
+    __slots__ = ("populacao", "indice")
+
+    def __init__(self, populacao: "Populacao", indice: int):
+        self.populacao = populacao
+        self.indice = indice
+
+    @property
+    def veiculos(self) -> int:
+        return int(self.populacao.veiculos[self.indice])
+
+    @veiculos.setter
+    def veiculos(self, valor: int):
+        self.populacao.veiculos[self.indice] = valor
+
+    @property
+    def capacidade(self) -> int:
+        return int(self.populacao.capacidade[self.indice])
+
+    @capacidade.setter
+    def capacidade(self, valor: int):
+        self.populacao.capacidade[self.indice] = valor
+
+    @property
+    def rota(self) -> np.ndarray:
+        return self.populacao.rotas[self.indice]
+
+    @rota.setter
+    def rota(self, valor):
+        self.populacao.rotas[self.indice] = valor
+
+    @property
+    def fitness(self) -> float:
+        return float(self.populacao.fitness[self.indice])
+
+
+class Populacao:
+    # População em estrutura de arrays: rotas (P, N) contíguas e vetores de veículos, capacidade e fitness.
+    # Fitness ainda não calculado fica como NaN.
+    def __init__(self, tamanho: int, quantidade_cidades: int, dtype_rota=None):
+        if dtype_rota is None:
+            dtype_rota = np.uint16 if quantidade_cidades <= np.iinfo(np.uint16).max + 1 else np.int32
+
+        self.rotas = np.zeros((tamanho, quantidade_cidades), dtype=dtype_rota)
+        self.veiculos = np.zeros(tamanho, dtype=np.int32)
+        self.capacidade = np.zeros(tamanho, dtype=np.int32)
+        self.fitness = np.full(tamanho, np.nan)
+
+    def __len__(self) -> int:
+        return len(self.rotas)
+
+    def __getitem__(self, indice: int) -> IndividuoLinha:
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+        return IndividuoLinha(self, indice)
+
+    def __setitem__(self, indice: int, individuo: Individuo):
+        # Copia o indivíduo para a linha; o fitness volta a ser desconhecido
+        self.rotas[indice] = individuo.rota
+        self.veiculos[indice] = individuo.veiculos
+        self.capacidade[indice] = individuo.capacidade
+        self.fitness[indice] = np.nan
+
+    def __iter__(self) -> Iterator[IndividuoLinha]:
+        for indice in range(len(self)):
+            yield IndividuoLinha(self, indice)
 
-        return round(tempo_total, 2)
\ No newline at end of file
+    def __repr__(self):
+        return f"População: {len(self)} indivíduos, {self.rotas.shape[1]} cidades"
+
+    @classmethod
+    def de_individuos(cls, individuos: List[Individuo], dtype_rota=None) -> "Populacao":
+        quantidade_cidades = len(individuos[0].rota) if individuos else 0
+        populacao = cls(len(individuos), quantidade_cidades, dtype_rota)
+
+        for indice, individuo in enumerate(individuos):
+            populacao.rotas[indice] = individuo.rota
+            populacao.veiculos[indice] = individuo.veiculos
+            populacao.capacidade[indice] = individuo.capacidade
+        return populacao
+
+    def copiar(self, origem: "Populacao", indices, posicoes=None):
+        # Copia as linhas `indices` de origem (com o fitness) para `posicoes`, por padrão as primeiras linhas
+        indices = np.asarray(indices, dtype=np.intp)
+        if posicoes is None:
+            posicoes = slice(0, len(indices))
+        self.rotas[posicoes] = origem.rotas[indices]
+        self.veiculos[posicoes] = origem.veiculos[indices]
+        self.capacidade[posicoes] = origem.capacidade[indices]
+        self.fitness[posicoes] = origem.fitness[indices]
+
+    def para_individuos(self, indices: Optional[List[int]] = None) -> List[Individuo]:
+        # Cópias independentes do buffer, para quem precisa guardar indivíduos além desta população
+        if indices is None:
+            indices = range(len(self))
+        return [
+            Individuo(int(self.veiculos[i]), int(self.capacidade[i]), self.rotas[i].tolist())
+            for i in indices
+        ]
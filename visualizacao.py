@@ -0,0 +1,438 @@
+import os
+import queue
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+from tipos import Individuo
+
+# Visualização reaproveitável entre gerações. matplotlib e pygame só são importados quando um
+# objeto daqui é criado, então importar este módulo não abre janela nem carrega backend gráfico.
+
+
+class GraficoConvergencia:
+    # Gráfico do melhor custo por geração com uma única Figure e uma única Line2D: cada ponto novo
+    # entra num array pré-alocado, e a imagem é o próprio buffer RGBA do Agg, compartilhado com
+    # uma Surface do pygame sem cópia. Enquanto os limites dos eixos não mudam, só a linha é
+    # redesenhada sobre o fundo guardado (blit), então o custo por geração não cresce com a execução.
+    def __init__(
+        self,
+        largura: int,
+        altura: int,
+        total_geracoes: Optional[int] = None,
+        dpi: int = 100,
+        titulo: str = "Evolução do Custo ao Longo das Gerações",
+    ):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        # Figure direto (sem pyplot): não entra na lista de figuras abertas do pyplot
+        self.figura = Figure(figsize=(largura / dpi, altura / dpi), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figura)
+        self.eixo = self.figura.add_subplot(1, 1, 1)
+        (self.linha,) = self.eixo.plot([], [], label="Custo Total", drawstyle="steps-post", animated=True)
+        self.eixo.set_xlabel("Geração")
+        self.eixo.set_ylabel("Custo")
+        self.eixo.set_title(titulo)
+        self.eixo.legend(handles=[self.linha], loc="upper right")
+        self.eixo.grid(True)
+        self.figura.tight_layout()
+
+        capacidade = total_geracoes or 1024
+        self._geracoes = np.empty(capacidade, dtype=np.float64)
+        self._custos = np.empty(capacidade, dtype=np.float64)
+        self._quantidade = 0
+        self._limite_x = float(total_geracoes or 100)
+        self._limites_y = None
+        self._redesenhar = True # Limites mudaram: fundo (eixos, rótulos, grade) precisa ser refeito
+        self._fundo = None
+        self._superficie = None
+        self._renderer = None
+
+    def __len__(self):
+        return self._quantidade
+
+    def adicionar(self, geracao: float, custo: float):
+        if self._quantidade == len(self._geracoes):
+            self._geracoes = np.concatenate((self._geracoes, np.empty_like(self._geracoes)))
+            self._custos = np.concatenate((self._custos, np.empty_like(self._custos)))
+
+        self._geracoes[self._quantidade] = geracao
+        self._custos[self._quantidade] = custo
+        self._quantidade += 1
+        self.linha.set_data(self._geracoes[: self._quantidade], self._custos[: self._quantidade])
+
+        if geracao > self._limite_x:
+            while geracao > self._limite_x:
+                self._limite_x *= 2
+            self._redesenhar = True
+
+        if self._limites_y is None or not self._limites_y[0] <= custo <= self._limites_y[1]:
+            # Amplia com folga de 10% da faixa para não refazer o fundo a cada ponto novo
+            minimo = min(custo, self._limites_y[0]) if self._limites_y else custo
+            maximo = max(custo, self._limites_y[1]) if self._limites_y else custo
+            folga = (maximo - minimo) * 0.1 or abs(custo) * 0.1 or 1.0
+            self._limites_y = (minimo - folga, maximo + folga)
+            self._redesenhar = True
+
+    def renderizar(self):
+        # Devolve a Surface do pygame que enxerga o buffer do Agg; ela é a mesma a cada chamada
+        # enquanto o tamanho da figura não muda
+        import pygame
+
+        if self._redesenhar:
+            self.eixo.set_xlim(1, self._limite_x)
+            if self._limites_y is not None:
+                self.eixo.set_ylim(*self._limites_y)
+            self.canvas.draw()
+            self._fundo = self.canvas.copy_from_bbox(self.eixo.bbox)
+            self._redesenhar = False
+        else:
+            self.canvas.restore_region(self._fundo)
+
+        self.eixo.draw_artist(self.linha)
+
+        renderer = self.canvas.get_renderer()
+        if renderer is not self._renderer:
+            # RGBX: o canal alfa do Agg é ignorado, então o blit na tela é cópia direta, sem mistura
+            self._renderer = renderer
+            self._superficie = pygame.image.frombuffer(
+                self.canvas.buffer_rgba(), self.canvas.get_width_height(), "RGBX"
+            )
+        return self._superficie
+
+
+class RenderizadorRotas:
+    # Desenho do mapa feito para ser chamado a cada geração: o fundo (pontos e nomes dos armazéns)
+    # é renderizado uma vez numa Surface própria, os rótulos "(i)" ficam em cache com o deslocamento
+    # já calculado, a rota sai de uma única chamada a pygame.draw.lines e a tela é atualizada com um
+    # único flip por quadro. O mapa com a rota também fica guardado e só é refeito quando a rota
+    # muda, o que nas gerações sem melhora reduz o quadro a uma cópia de Surface.
+    def __init__(
+        self,
+        screen,
+        armazens,
+        cor_fundo=(0, 0, 0),
+        cor_texto=(255, 255, 255),
+        cor_ponto=(0, 0, 255),
+        cor_rota=(255, 0, 0),
+        cor_info=(0, 255, 0),
+        posicao_info=(10, 500),
+        tamanho_fonte: int = 20,
+    ):
+        import pygame
+
+        pygame.font.init()
+        self.screen = screen
+        self.fonte = pygame.font.Font(None, tamanho_fonte)
+        self.cor_texto = cor_texto
+        self.cor_rota = cor_rota
+        self.cor_info = cor_info
+        self.posicao_info = posicao_info
+        self._pontos = np.array([armazem.localizacao for armazem in armazens], dtype=np.int64).reshape(-1, 2)
+
+        self.fundo = pygame.Surface(screen.get_size(), 0, screen) # Mesmo formato da tela: blit sem conversão
+        self.fundo.fill(cor_fundo)
+        for armazem in armazens:
+            x, y = armazem.localizacao
+            pygame.draw.circle(self.fundo, cor_ponto, (x, y), 5)
+            texto = self.fonte.render(armazem.nome_cidade, True, cor_texto)
+            self.fundo.blit(texto, texto.get_rect(center=(x - 15, y - 15)))
+
+        # Rótulo da i-ésima parada da rota: a Surface e o deslocamento do canto superior esquerdo
+        # em relação ao armazém (centralizado em x - 20, y - 30)
+        self._rotulos = []
+        self._deslocamentos = np.zeros((len(armazens), 2), dtype=np.int64)
+        for posicao in range(len(armazens)):
+            texto = self.fonte.render(f"({posicao + 1})", True, cor_texto)
+            retangulo = texto.get_rect(center=(-20, -30))
+            self._rotulos.append(texto)
+            self._deslocamentos[posicao] = retangulo.topleft
+
+        self._camada = self.fundo.copy()
+        self._rota = None
+
+    def desenhar_rotas(self, melhor_rota):
+        import pygame
+
+        rota = np.asarray(melhor_rota, dtype=np.int64)
+        if self._rota is None or not np.array_equal(rota, self._rota):
+            self._camada.blit(self.fundo, (0, 0))
+            pontos = self._pontos[rota]
+            if len(pontos) > 1:
+                pygame.draw.lines(self._camada, self.cor_rota, True, pontos.tolist(), 2)
+            cantos = (pontos + self._deslocamentos[: len(pontos)]).tolist()
+            self._camada.blits(zip(self._rotulos, cantos), doreturn=False)
+            self._rota = rota.copy()
+
+        self.screen.blit(self._camada, (0, 0))
+
+    def desenhar_info(self, geracao, melhor_tempo, melhor_individuo):
+        x, y = self.posicao_info
+        linhas = [f"Geração: {geracao}"]
+        if melhor_individuo:
+            linhas += [f"Melhor indivíduo: {melhor_individuo}", f"Melhor tempo: {melhor_tempo}"]
+        for linha in linhas:
+            self.screen.blit(self.fonte.render(linha, True, self.cor_info), (x, y))
+            y += 20
+
+    def apresentar(self):
+        import pygame
+
+        pygame.display.flip()
+
+    def quadro(self, melhor_rota, geracao, melhor_tempo, melhor_individuo):
+        self.desenhar_rotas(melhor_rota)
+        self.desenhar_info(geracao, melhor_tempo, melhor_individuo)
+        self.apresentar()
+
+
+class Instantaneo:
+    # Cópia do melhor indivíduo de uma geração: o GA pode reaproveitar o indivíduo original (ou a
+    # linha da população em arrays) na geração seguinte, enquanto o quadro ainda está na fila.
+    # tamanho_historico: quantas entradas de Visualizador.historico já existiam neste quadro.
+    __slots__ = ("geracao", "melhor_tempo", "melhor_individuo", "tamanho_historico")
+
+    def __init__(self, geracao: int, melhor_tempo: float, melhor_individuo, tamanho_historico: int = 0):
+        self.geracao = geracao
+        self.melhor_tempo = melhor_tempo
+        self.tamanho_historico = tamanho_historico
+        self.melhor_individuo = Individuo(
+            int(melhor_individuo.veiculos), int(melhor_individuo.capacidade), np.array(melhor_individuo.rota).tolist()
+        )
+
+
+class Visualizador:
+    # Liga o GA a um laço de desenho separado. O GA publica um Instantaneo só quando o melhor
+    # melhora, numa fila limitada que nunca bloqueia: cheia, o quadro mais antigo é descartado.
+    # O laço de desenho roda na thread principal (exigência do pygame em alguns sistemas), enquanto
+    # o GA roda numa thread própria; a cada quadro ele pega só o instantâneo mais recente.
+    # O histórico (geração, melhor tempo até ela) é gravado a cada publicação, do lado do GA, então
+    # o gráfico de convergência não depende de quais quadros chegaram a ser desenhados.
+    def __init__(self, capacidade: int = 2, quadros_por_segundo: int = 60):
+        self.fila = queue.Queue(maxsize=max(capacidade, 1))
+        self.quadros_por_segundo = quadros_por_segundo
+        self.parado = False # Janela fechada: o GA para na próxima geração
+        self.publicados = 0
+        self.descartados = 0
+        self.desenhados = 0
+        self.historico = [] # Só recebe append da thread do GA; o laço de desenho lê fatias
+        self._melhor_tempo = None
+
+    def publicar(self, geracao: int, melhor_individuo, melhor_tempo: float) -> bool:
+        melhorou = self._melhor_tempo is None or melhor_tempo < self._melhor_tempo
+        if melhorou:
+            self._melhor_tempo = melhor_tempo
+        self.historico.append((geracao, self._melhor_tempo))
+        if not melhorou:
+            return False
+
+        instantaneo = Instantaneo(geracao, melhor_tempo, melhor_individuo, len(self.historico))
+        while True:
+            try:
+                self.fila.put_nowait(instantaneo)
+                break
+            except queue.Full:
+                try:
+                    self.fila.get_nowait()
+                    self.descartados += 1
+                except queue.Empty:
+                    pass
+        self.publicados += 1
+        return True
+
+    def observador(self, evento) -> Optional[bool]:
+        # Para AlgoritmoGenetico.observar
+        self.publicar(evento.geracao, evento.melhor_individuo, evento.melhor_tempo)
+        if self.parado:
+            return False
+
+    def mais_recente(self, espera: float = 0.0) -> Optional[Instantaneo]:
+        # Espera até `espera` segundos pelo primeiro instantâneo e descarta os que ficaram velhos
+        try:
+            instantaneo = self.fila.get(timeout=espera) if espera > 0 else self.fila.get_nowait()
+        except queue.Empty:
+            return None
+        while True:
+            try:
+                proximo = self.fila.get_nowait()
+            except queue.Empty:
+                return instantaneo
+            self.descartados += 1
+            instantaneo = proximo
+
+    def executar(self, otimizar: Callable[[], object], desenhar: Callable[[Instantaneo], None]):
+        # Roda `otimizar` numa thread e desenha na thread atual até ele terminar; devolve o
+        # resultado de `otimizar` (ou repassa a exceção dele)
+        import pygame
+
+        resultado = {}
+
+        def trabalho():
+            try:
+                resultado["valor"] = otimizar()
+            except BaseException as erro:
+                resultado["erro"] = erro
+
+        thread = threading.Thread(target=trabalho, name="ga", daemon=True)
+        thread.start()
+
+        relogio = pygame.time.Clock()
+        ultimo = None
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.parado = True
+
+            terminou = not thread.is_alive()
+            instantaneo = self.mais_recente(1 / self.quadros_por_segundo)
+            if instantaneo is not None:
+                desenhar(instantaneo)
+                ultimo = instantaneo
+                self.desenhados += 1
+                relogio.tick(self.quadros_por_segundo)
+            elif terminou:
+                break
+
+        # Gerações sem melhora depois do último quadro: redesenha uma vez com o histórico completo
+        if ultimo is not None and ultimo.tamanho_historico < len(self.historico) and not self.parado:
+            ultimo.tamanho_historico = len(self.historico)
+            desenhar(ultimo)
+            self.desenhados += 1
+
+        thread.join()
+        if "erro" in resultado:
+            raise resultado["erro"]
+        return resultado.get("valor")
+
+
+FORMATOS_GRAVACAO = ("png", "rgb")
+
+
+class GravadorQuadros:
+    # Gravação sem tela: o mapa (RenderizadorRotas) e o gráfico de convergência são desenhados numa
+    # Surface em memória a cada `passo` gerações, e os quadros seguem em lotes para uma thread que
+    # escreve em disco. A fila de lotes é limitada: se o disco não acompanha, o GA espera, e a
+    # memória fica em no máximo (lotes_pendentes + 2) · quadros_por_lote quadros.
+    #
+    # formato "png": `destino` é uma pasta, com quadro_000001.png, quadro_000002.png, ...
+    # formato "rgb": `destino` é um arquivo (ou FIFO) ou objeto binário com write(), recebendo os
+    # quadros RGB24 crus em sequência, por exemplo para
+    #   ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x840 -r 30 -i quadros.rgb video.mp4
+    def __init__(
+        self,
+        armazens,
+        destino,
+        formato: str = "png",
+        tamanho=(800, 600),
+        altura_grafico: int = 240,
+        passo: int = 1,
+        total_geracoes: Optional[int] = None,
+        quadros_por_lote: int = 16,
+        lotes_pendentes: int = 2,
+    ):
+        import pygame
+
+        if formato not in FORMATOS_GRAVACAO:
+            raise ValueError(f"Formato de gravação desconhecido: {formato}")
+
+        largura, altura = tamanho
+        self.formato = formato
+        self.passo = max(passo, 1)
+        self.quadros_por_lote = max(quadros_por_lote, 1)
+        self.quadro = pygame.Surface((largura, altura + altura_grafico))
+        self.renderizador = RenderizadorRotas(self.quadro.subsurface((0, 0, largura, altura)), armazens)
+        self.grafico = GraficoConvergencia(largura, altura_grafico, total_geracoes) if altura_grafico > 0 else None
+        self.posicao_grafico = (0, altura)
+        self.gravados = 0
+
+        self._proprio = False
+        if formato == "png":
+            os.makedirs(destino, exist_ok=True)
+            self._destino = destino
+        elif isinstance(destino, str):
+            self._destino = open(destino, "wb")
+            self._proprio = True
+        else:
+            self._destino = destino
+
+        self._lote = []
+        self._fila = queue.Queue(maxsize=max(lotes_pendentes, 1))
+        self._erro = None
+        self._escritor = threading.Thread(target=self._escrever, name="gravador", daemon=True)
+        self._escritor.start()
+
+    @property
+    def tamanho_quadro(self):
+        return self.quadro.get_size()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def gravar(self, geracao: int, melhor_individuo, melhor_tempo: float):
+        import pygame
+
+        # O gráfico recebe todas as gerações; só o desenho e a cópia dos pixels seguem o passo
+        if self.grafico is not None:
+            self.grafico.adicionar(geracao, melhor_tempo)
+        if geracao % self.passo:
+            return
+        if self._erro is not None:
+            raise self._erro
+
+        self.renderizador.desenhar_rotas(melhor_individuo.rota)
+        self.renderizador.desenhar_info(geracao, melhor_tempo, melhor_individuo)
+        if self.grafico is not None:
+            self.quadro.blit(self.grafico.renderizar(), self.posicao_grafico)
+
+        self._lote.append(pygame.image.tobytes(self.quadro, "RGB"))
+        self.gravados += 1
+        if len(self._lote) >= self.quadros_por_lote:
+            self._fila.put(self._lote)
+            self._lote = []
+
+    def observador(self, evento):
+        # Para AlgoritmoGenetico.observar
+        self.gravar(evento.geracao, evento.melhor_individuo, evento.melhor_tempo)
+
+    def fechar(self):
+        # Entrega o lote incompleto, espera a escrita terminar e repassa um erro da thread, se houve
+        if self._escritor is None:
+            return
+        if self._lote:
+            self._fila.put(self._lote)
+            self._lote = []
+        self._fila.put(None)
+        self._escritor.join()
+        self._escritor = None
+        if self._proprio:
+            self._destino.close()
+        if self._erro is not None:
+            raise self._erro
+
+    def _escrever(self):
+        import pygame
+
+        tamanho = self.quadro.get_size()
+        numero = 0
+        while True:
+            lote = self._fila.get()
+            if lote is None:
+                break
+            if self._erro is not None:
+                continue # Continua esvaziando a fila para não travar o GA num put
+            try:
+                if self.formato == "png":
+                    for pixels in lote:
+                        numero += 1
+                        superficie = pygame.image.frombuffer(pixels, tamanho, "RGB")
+                        pygame.image.save(superficie, os.path.join(self._destino, f"quadro_{numero:06d}.png"))
+                else:
+                    self._destino.writelines(lote)
+                    self._destino.flush()
+            except Exception as erro:
+                self._erro = erro
@@ -0,0 +1,114 @@
+import warnings
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from distancias import OraculoCoordenadas, ProvedorDistancias, como_provedor
+
+# Índice de vizinhos mais próximos montado a partir das coordenadas dos armazéns, sem a matriz N×N.
+# Usa a KD-tree do SciPy quando ele está instalado (O(N log N)); sem SciPy cai numa busca
+# exaustiva em blocos, que dá o mesmo resultado com memória limitada, mas em O(N²). SciPy é
+# opcional (ver README); sem ele sai um RuntimeWarning, sempre do mesmo ponto, mostrado uma vez só.
+# Sem coordenadas, monta o mesmo índice de qualquer provedor de distâncias pela busca em blocos.
+
+
+def _consultar_kdtree(coordenadas: np.ndarray, quantidade: int):
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        warnings.warn(
+            "SciPy não está instalado: o índice de vizinhos usa a busca exaustiva em blocos, O(N²)",
+            RuntimeWarning,
+        )
+        return None
+
+    # k + 1 porque a cidade mais próxima de cada ponto é ele mesmo. Com coordenadas repetidas ele
+    # pode vir em qualquer coluna, ou nem vir: sai a entrada igual ao índice da linha, ou a última
+    distancias, vizinhos = cKDTree(coordenadas).query(coordenadas, k=quantidade + 1)
+    descartar = vizinhos == np.arange(len(coordenadas))[:, None]
+    descartar[~descartar.any(axis=1), -1] = True
+    return vizinhos[~descartar].reshape(-1, quantidade), distancias[~descartar].reshape(-1, quantidade)
+
+
+def _consultar_blocos(provedor: ProvedorDistancias, quantidade: int, tamanho_bloco: int = 256):
+    total = len(provedor)
+    vizinhos = np.empty((total, quantidade), dtype=np.int64)
+    distancias = np.empty((total, quantidade), dtype=np.float64)
+
+    for inicio in range(0, total, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, total)
+        bloco = np.array(provedor.linhas(inicio, fim), dtype=np.float64) # Cópia: na matriz densa é uma view
+        bloco[np.arange(fim - inicio), np.arange(inicio, fim)] = np.inf # A própria cidade não conta
+
+        candidatos = np.argpartition(bloco, quantidade - 1, axis=1)[:, :quantidade]
+        distancias_candidatos = np.take_along_axis(bloco, candidatos, axis=1)
+        ordem = np.argsort(distancias_candidatos, axis=1, kind="stable")
+        vizinhos[inicio:fim] = np.take_along_axis(candidatos, ordem, axis=1)
+        distancias[inicio:fim] = np.take_along_axis(distancias_candidatos, ordem, axis=1)
+
+    return vizinhos, distancias
+
+
+class IndiceVizinhos:
+    # vizinhos (N, k) int32 e distancias (N, k) float32, do mais perto para o mais longe.
+    # Recebe as coordenadas (local_cidades) ou, na falta delas, a matriz / provedor de distâncias.
+    def __init__(
+        self,
+        local_cidades: Optional[List[Tuple[int, int]]] = None,
+        quantidade: int = 8,
+        dist_matrix: Union[None, np.ndarray, ProvedorDistancias] = None,
+    ):
+        if local_cidades is not None:
+            self.provedor = OraculoCoordenadas(local_cidades)
+        elif dist_matrix is not None:
+            self.provedor = como_provedor(dist_matrix)
+        else:
+            raise ValueError("IndiceVizinhos precisa de local_cidades ou dist_matrix")
+        self.coordenadas = getattr(self.provedor, "coordenadas", None) # Só quando as coordenadas são conhecidas
+        total = len(self.provedor)
+        self.quantidade = min(quantidade, max(total - 1, 0))
+
+        if self.quantidade == 0:
+            self.vizinhos = np.zeros((total, 0), dtype=np.int32)
+            self.distancias = np.zeros((total, 0), dtype=np.float32)
+            return
+
+        resultado = None if self.coordenadas is None else _consultar_kdtree(self.coordenadas, self.quantidade)
+        if resultado is None:
+            resultado = _consultar_blocos(self.provedor, self.quantidade)
+
+        vizinhos, distancias = resultado
+        self.vizinhos = np.ascontiguousarray(vizinhos, dtype=np.int32)
+        self.distancias = np.ascontiguousarray(distancias, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.provedor)
+
+    def __repr__(self):
+        return f"Índice de vizinhos: {len(self)} cidades, {self.quantidade} vizinhos"
+
+    def rota_vizinho_mais_proximo(self, inicio: int = 0) -> List[int]:
+        # Rota gulosa: sempre vai para o vizinho mais próximo ainda não visitado. Quando a lista de
+        # vizinhos inteira já foi visitada, procura o mais próximo entre todas as cidades restantes.
+        total = len(self)
+        if total == 0:
+            return []
+
+        visitado = np.zeros(total, dtype=bool)
+        vizinhos = self.vizinhos.tolist()
+        rota = [inicio]
+        visitado[inicio] = True
+        atual = inicio
+
+        for _ in range(total - 1):
+            proxima = next((cidade for cidade in vizinhos[atual] if not visitado[cidade]), None)
+            if proxima is None:
+                restantes = np.flatnonzero(~visitado)
+                distancias = self.provedor.pares(np.full(len(restantes), atual), restantes)
+                proxima = int(restantes[np.argmin(distancias)])
+
+            rota.append(proxima)
+            visitado[proxima] = True
+            atual = proxima
+
+        return rota